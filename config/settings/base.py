@@ -5,6 +5,7 @@ import platform
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
 from opensearch_dsl import connections
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
@@ -309,6 +310,13 @@ task_time_limit = 2 * 60 * 60
 task_soft_time_limit = 60 * 60
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-scheduler
 beat_scheduler = "django_celery_beat.schedulers:DatabaseScheduler"
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-schedule
+CELERY_BEAT_SCHEDULE = {
+    "reindex-updated-articles": {
+        "task": "scoap3.articles.tasks.reindex_updated_articles",
+        "schedule": crontab(minute=0),
+    },
+}
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-send-task-events
 worker_send_task_events = True
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std-setting-task_send_sent_event
@@ -352,6 +360,9 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "scoap3.utils.pagination.StandardResultsSetPagination",
 }
 
+# Counts the requests of UserGroupThrottle
+THROTTLE_LIMITER = "scoap3.utils.throttling.CacheHistoryLimiter"
+
 # django-cors-headers - https://github.com/adamchainz/django-cors-headers#setup
 CORS_URLS_REGEX = r"^/api/.*$"
 
@@ -384,6 +395,11 @@ OPENSEARCH_INDEX_NAMES = {
 OPENSEARCH_DSL = {
     "default": {"hosts": env("OPENSEARCH_HOST")},
 }
+# Index changed articles in a Celery task once their transaction commits
+OPENSEARCH_DSL_SIGNAL_PROCESSOR = "scoap3.articles.signals.QueuedSignalProcessor"
+# Seconds a search response is cached, writes to the index invalidate it sooner.
+# Only enable it with a cache shared by the web and Celery processes.
+SEARCH_CACHE_TIMEOUT = env.int("SEARCH_CACHE_TIMEOUT", default=3600)
 
 # Workaround because it wont add the connection settings automatically
 connections.configure(default=OPENSEARCH_DSL["default"])
@@ -22,6 +22,9 @@ CACHES = {
         "LOCATION": "",
     }
 }
+# The cache is per process, so the Celery workers indexing articles could
+# not invalidate the search responses cached by the web server.
+SEARCH_CACHE_TIMEOUT = 0
 
 # STORAGE
 # ------------------------
@@ -38,6 +41,12 @@ STORAGES = {
             "location": str(BASE_DIR / "legacy_records"),  # noqa: F405
         },
     },
+    "legacy-files": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": str(BASE_DIR / "legacy_files"),  # noqa: F405
+        },
+    },
 }
 
 # EMAIL
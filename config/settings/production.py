@@ -35,6 +35,7 @@ CACHES = {
         },
     }
 }
+THROTTLE_LIMITER = "scoap3.utils.throttling.RedisSlidingWindowLimiter"
 
 # SECURITY
 # ------------------------------------------------------------------------------
@@ -117,6 +118,16 @@ STORAGES = {
             "file_overwrite": "True",
         },
     },
+    "legacy-files": {
+        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        "OPTIONS": {
+            "bucket_name": env(
+                "LEGACY_FILES_BUCKET_NAME",
+                default=env("DJANGO_AWS_STORAGE_BUCKET_NAME"),
+            ),
+            "location": env("LEGACY_FILES_LOCATION", default="legacy_files/"),
+        },
+    },
 }
 
 
@@ -1,6 +1,11 @@
 from django.contrib import admin
 
-from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.articles.models import (
+    Article,
+    ArticleFile,
+    ArticleIdentifier,
+    ArticleIndexSync,
+)
 
 
 class ArticleAdmin(admin.ModelAdmin):
@@ -17,16 +22,18 @@ class ArticleIdentifierAdmin(admin.ModelAdmin):
 class ArticleFileAdmin(admin.ModelAdmin):
     list_display = ["id", "article_id", "file", "file_size", "updated", "created"]
     search_fields = ["article_id"]
+    readonly_fields = ["size", "checksum", "content_type"]
 
     @admin.display(description="Size (bytes)")
     def file_size(self, obj):
-        try:
-            file_size = obj.file.size
-        except FileNotFoundError:
-            file_size = "-"
-        return f"{file_size}"
+        return "-" if obj.size is None else f"{obj.size}"
+
+
+class ArticleIndexSyncAdmin(admin.ModelAdmin):
+    list_display = ["task", "started_at", "finished_at", "indexed"]
 
 
 admin.site.register(Article, ArticleAdmin)
 admin.site.register(ArticleIdentifier, ArticleIdentifierAdmin)
 admin.site.register(ArticleFile, ArticleFileAdmin)
+admin.site.register(ArticleIndexSync, ArticleIndexSyncAdmin)
@@ -1,15 +1,8 @@
-from datetime import datetime
-
 from django_elasticsearch_dsl_drf.serializers import DocumentSerializer
 from rest_framework import serializers
 
 from scoap3.articles.documents import ArticleDocument
-from scoap3.articles.models import (
-    Article,
-    ArticleFile,
-    ArticleIdentifier,
-    ArticleIdentifierType,
-)
+from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
 from scoap3.misc.api.serializers import (
     ArticleArxivCategorySerializer,
     PublicationInfoSerializer,
@@ -36,43 +29,61 @@ class ArticleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Article
-        fields = "__all__"
+        exclude = ["_import_source_hash", "_affiliations_source_hash"]
+
+
+class _LegacyTitleSerializer(serializers.Serializer):
+    title = serializers.CharField()
+
+
+class _LegacyImprintSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    publisher = serializers.CharField()
+
+
+class _LegacyAuthorSerializer(serializers.Serializer):
+    affiliations = serializers.ListField(child=serializers.DictField(), required=False)
+
+
+class LegacyRecordSerializer(serializers.Serializer):
+    """Checks the parts of a legacy record ``import_to_scoap3`` relies on."""
+
+    control_number = serializers.IntegerField()
+    titles = _LegacyTitleSerializer(many=True, allow_empty=False)
+    abstracts = serializers.ListField(child=serializers.DictField(), min_length=1)
+    imprints = _LegacyImprintSerializer(many=True, allow_empty=False)
+    license = serializers.ListField(child=serializers.DictField())
+    dois = serializers.ListField(child=serializers.DictField())
+    _files = serializers.ListField(child=serializers.DictField(), required=False)
+    arxiv_eprints = serializers.ListField(child=serializers.DictField(), required=False)
+    copyright = serializers.ListField(child=serializers.DictField(), required=False)
+    publication_info = serializers.ListField(
+        child=serializers.DictField(), required=False
+    )
+    collaborations = serializers.ListField(
+        child=serializers.DictField(), required=False
+    )
+    authors = _LegacyAuthorSerializer(many=True, required=False)
 
 
 class ArticleDocumentSerializer(DocumentSerializer):
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         document = ArticleDocument
         fields = "__all__"
 
 
 class SearchCSVSerializer(DocumentSerializer):
-    _created_at = serializers.SerializerMethodField()
-    doi = serializers.SerializerMethodField()
-    arxiv_id = serializers.SerializerMethodField()
-    arxiv_primary_category = serializers.SerializerMethodField()
-    journal = serializers.SerializerMethodField()
-
-    def get__created_at(self, obj):
-        return datetime.strptime(obj._created_at, "%Y-%m-%dT%H:%M:%S.%f%z").date()
-
-    def get_doi(self, obj):
-        for article_identifier in obj.article_identifiers:
-            if article_identifier.identifier_type == ArticleIdentifierType.DOI:
-                return article_identifier.identifier_value
-
-    def get_arxiv_id(self, obj):
-        for article_identifier in obj.article_identifiers:
-            if article_identifier.identifier_type == ArticleIdentifierType.ARXIV:
-                return article_identifier.identifier_value
-
-    def get_arxiv_primary_category(self, obj):
-        for arxiv_category in obj.article_arxiv_category:
-            if arxiv_category.primary:
-                return arxiv_category.category
-
-    def get_journal(self, obj):
-        for publication_info in obj.publication_info:
-            return publication_info.journal_title
+    _created_at = serializers.CharField(source="created_date", allow_null=True)
+    doi = serializers.CharField(allow_null=True)
+    arxiv_id = serializers.CharField(allow_null=True)
+    arxiv_primary_category = serializers.CharField(allow_null=True)
+    journal = serializers.CharField(allow_null=True)
 
     class Meta:
         document = ArticleDocument
@@ -1,3 +1,8 @@
+import csv
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
 from django_elasticsearch_dsl_drf.constants import LOOKUP_FILTER_RANGE, LOOKUP_QUERY_IN
 from django_elasticsearch_dsl_drf.filter_backends import (
     FacetedSearchFilterBackend,
@@ -6,6 +11,9 @@ from django_elasticsearch_dsl_drf.filter_backends import (
 )
 from django_elasticsearch_dsl_drf.viewsets import BaseDocumentViewSet
 from opensearch_dsl import DateHistogramFacet, TermsFacet
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import (
     CreateModelMixin,
     DestroyModelMixin,
@@ -23,12 +31,16 @@ from scoap3.articles.api.serializers import (
     ArticleFileSerializer,
     ArticleIdentifierSerializer,
     ArticleSerializer,
+    LegacyRecordSerializer,
     SearchCSVSerializer,
 )
+from scoap3.articles.cache import search_cache_key
 from scoap3.articles.documents import ArticleDocument
 from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
-from scoap3.utils.pagination import OSStandardResultsSetPagination
+from scoap3.tasks import import_records
+from scoap3.utils.pagination import OSCursorPagination, OSStandardResultsSetPagination
 from scoap3.utils.renderer import ArticleCSVRenderer
+from scoap3.utils.search import search_after_hits
 
 
 class ArticleViewSet(
@@ -42,6 +54,23 @@ class ArticleViewSet(
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    bulk_max_records = 1000
+    # Relations ArticleSerializer reads, for the actions serializing articles.
+    prefetch_related = {
+        action: [
+            "related_licenses",
+            "related_materials",
+            "related_files",
+            "article_identifiers",
+            "article_arxiv_category",
+            "publication_info",
+        ]
+        for action in ["list", "retrieve", "update", "partial_update"]
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return queryset.prefetch_related(*self.prefetch_related.get(self.action, []))
 
     def create(self, request, *args, **kwargs):
         data = request.data
@@ -58,6 +87,44 @@ class ArticleViewSet(
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=201, headers=headers)
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Import records with their authors, affiliations and identifiers.
+
+        Takes one record or a list of records in the legacy record format and
+        writes them in one transaction. Answers with the outcome of each.
+        """
+        records = request.data if isinstance(request.data, list) else [request.data]
+        if not records or len(records) > self.bulk_max_records:
+            raise ValidationError(
+                {"records": [f"Send between 1 and {self.bulk_max_records} records."]}
+            )
+        serializer = LegacyRecordSerializer(data=records, many=True)
+        if not serializer.is_valid():
+            raise ValidationError({"records": serializer.errors})
+        control_numbers = [record["control_number"] for record in records]
+        if len(set(control_numbers)) != len(control_numbers):
+            raise ValidationError({"control_number": ["Control numbers must differ."]})
+
+        results = import_records(records)
+        failed = any(result["status"] == "failed" for result in results)
+        return Response(
+            {"results": results},
+            status=status.HTTP_207_MULTI_STATUS if failed else status.HTTP_200_OK,
+        )
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_rows(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
 
 class ArticleDocumentView(BaseDocumentViewSet):
     document = ArticleDocument
@@ -71,6 +138,9 @@ class ArticleDocumentView(BaseDocumentViewSet):
 
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = OSStandardResultsSetPagination
+    cursor_pagination_class = OSCursorPagination
+    export_page_size = 1000
+    fields_query_param = "fields"
 
     search_fields = ("title", "id")
 
@@ -106,12 +176,101 @@ class ArticleDocumentView(BaseDocumentViewSet):
         },
     }
 
+    @property
+    def paginator(self):
+        """Use cursor pagination when the request asks for a ``cursor``."""
+        if not hasattr(self, "_paginator"):
+            cursor_param = self.cursor_pagination_class.cursor_query_param
+            if cursor_param in self.request.query_params:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        """Serve repeated searches from the cache until the index changes."""
+        if not settings.SEARCH_CACHE_TIMEOUT:
+            return super().list(request, *args, **kwargs)
+        key = search_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.SEARCH_CACHE_TIMEOUT)
+        return response
+
+    def get_source_fields(self):
+        """Return the fields requested with ``fields=``, or None for all."""
+        value = self.request.query_params.get(self.fields_query_param)
+        if not value or self.get_serializer_class() is not ArticleDocumentSerializer:
+            return None
+        fields = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(fields) - set(ArticleDocumentSerializer().fields)
+        if unknown:
+            message = f"Unknown fields: {', '.join(sorted(unknown))}"
+            raise ValidationError({self.fields_query_param: [message]})
+        return fields
+
+    def get_filter_backends(self):
+        """Leave out the facets where the response does not return them."""
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if self.action == "export" or self.request.query_params.get(cursor_param):
+            return [
+                backend
+                for backend in self.filter_backends
+                if backend is not FacetedSearchFilterBackend
+            ]
+        return self.filter_backends
+
+    def filter_queryset(self, queryset):
+        for backend in self.get_filter_backends():
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        fields = self.get_source_fields()
+        if fields:
+            queryset = queryset.source(fields)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_source_fields()
+        if fields:
+            kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
+
     def get_serializer_class(self):
         requested_renderer_format = self.request.accepted_media_type
         if "text/csv" in requested_renderer_format:
             return SearchCSVSerializer
         return ArticleDocumentSerializer
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream every article matching the query as CSV."""
+        body = self.filter_queryset(self.get_queryset()).to_dict()
+        columns = {
+            name: field.source for name, field in SearchCSVSerializer().fields.items()
+        }
+        body["_source"] = list(columns.values())
+        hits = search_after_hits(
+            self.client,
+            self.index,
+            body,
+            "id.keyword",
+            page_size=self.export_page_size,
+        )
+
+        response = StreamingHttpResponse(
+            _csv_rows(
+                [ArticleCSVRenderer.labels.get(name, name) for name in columns],
+                (
+                    [hit["_source"].get(source) for source in columns.values()]
+                    for hit in hits
+                ),
+            ),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = 'attachment; filename="articles.csv"'
+        return response
+
 
 class ArticleIdentifierViewSet(
     ListModelMixin,
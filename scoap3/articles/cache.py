@@ -0,0 +1,33 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+SEARCH_GENERATION_KEY = "articles:search-generation"
+
+
+def search_generation():
+    """Return the counter bumped whenever the articles index is written."""
+    generation = cache.get(SEARCH_GENERATION_KEY)
+    if generation is None:
+        # Start from the clock so an evicted counter never repeats a value.
+        cache.add(SEARCH_GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(SEARCH_GENERATION_KEY)
+    return generation
+
+
+def bump_search_generation():
+    """Invalidate every cached search response."""
+    try:
+        cache.incr(SEARCH_GENERATION_KEY)
+    except ValueError:
+        cache.set(SEARCH_GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def search_cache_key(request):
+    """Cache key of a search request, independent of its parameters order."""
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    normalized = f"{request.path}?{query} {request.accepted_media_type}"
+    digest = hashlib.sha256(normalized.encode("UTF-8")).hexdigest()
+    return f"articles:search:{search_generation()}:{digest}"
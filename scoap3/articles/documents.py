@@ -1,15 +1,15 @@
 from django.conf import settings
+from django.db import models
 from django_opensearch_dsl import Document, fields
 from django_opensearch_dsl.registries import registry
 
-from scoap3.misc.models import ArticleArxivCategory, PublicationInfo
-
-from .models import Article, ArticleFile, ArticleIdentifier
+from .cache import bump_search_generation
+from .models import Article, ArticleIdentifierType
 
 
 @registry.register_document
 class ArticleDocument(Document):
-    id = fields.TextField()
+    id = fields.TextField(fields={"keyword": fields.KeywordField()})
     reception_date = fields.DateField()
     acceptance_date = fields.DateField()
     publication_date = fields.DateField()
@@ -63,8 +63,37 @@ class ArticleDocument(Document):
 
     _updated_at = fields.DateField()
 
+    doi = fields.KeywordField()
+    arxiv_id = fields.KeywordField()
+    arxiv_primary_category = fields.KeywordField()
+    journal = fields.KeywordField()
+    created_date = fields.DateField()
+
+    def get_queryset(self, filter_=None, exclude=None, count=None):
+        return (
+            super()
+            .get_queryset(filter_=filter_, exclude=exclude, count=count)
+            .prefetch_related(
+                "related_licenses",
+                "related_materials",
+                "related_files",
+                "article_identifiers",
+                "article_arxiv_category",
+                "publication_info",
+            )
+        )
+
+    def update(self, thing, action, *args, refresh=None, **kwargs):
+        """Write to the index, then invalidate the cached search responses."""
+        if refresh is None and isinstance(thing, models.Model):
+            # Searches cached after the bump must already see the change.
+            refresh = "wait_for"
+        result = super().update(thing, action, *args, refresh=refresh, **kwargs)
+        bump_search_generation()
+        return result
+
     def prepare_article_identifiers(self, instance):
-        article_identifiers = ArticleIdentifier.objects.filter(article_id=instance)
+        article_identifiers = instance.article_identifiers.all()
         serialized_article_identifiers = []
         for article_identifier in article_identifiers:
             serialized_article_identifier = {
@@ -75,7 +104,7 @@ class ArticleDocument(Document):
         return serialized_article_identifiers
 
     def prepare_related_files(self, instance):
-        article_files = ArticleFile.objects.filter(article_id=instance)
+        article_files = instance.related_files.all()
         serialized_files = []
         for file in article_files:
             serialized_file = {
@@ -87,7 +116,7 @@ class ArticleDocument(Document):
         return serialized_files
 
     def prepare_article_arxiv_category(self, instance):
-        arxiv_categories = ArticleArxivCategory.objects.filter(article_id=instance)
+        arxiv_categories = instance.article_arxiv_category.all()
         serialized_arxiv_categories = []
         for arxiv_category in arxiv_categories:
             serialized_arxiv_category = {
@@ -98,7 +127,7 @@ class ArticleDocument(Document):
         return serialized_arxiv_categories
 
     def prepare_publication_info(self, instance):
-        publication_infos = PublicationInfo.objects.filter(article_id=instance)
+        publication_infos = instance.publication_info.all()
         serialized_publication_infos = []
         for publication_info in publication_infos:
             serialized_publication_info = {
@@ -113,6 +142,30 @@ class ArticleDocument(Document):
             serialized_publication_infos.append(serialized_publication_info)
         return serialized_publication_infos
 
+    def _identifier(self, instance, identifier_type):
+        for article_identifier in instance.article_identifiers.all():
+            if article_identifier.identifier_type == identifier_type:
+                return article_identifier.identifier_value
+
+    def prepare_doi(self, instance):
+        return self._identifier(instance, ArticleIdentifierType.DOI)
+
+    def prepare_arxiv_id(self, instance):
+        return self._identifier(instance, ArticleIdentifierType.ARXIV)
+
+    def prepare_arxiv_primary_category(self, instance):
+        for arxiv_category in instance.article_arxiv_category.all():
+            if arxiv_category.primary:
+                return arxiv_category.category
+
+    def prepare_journal(self, instance):
+        for publication_info in instance.publication_info.all():
+            return publication_info.journal_title
+
+    def prepare_created_date(self, instance):
+        if instance._created_at:
+            return instance._created_at.date()
+
     class Index:
         name = settings.OPENSEARCH_INDEX_NAMES[__name__]
         settings = {"number_of_shards": 1, "number_of_replicas": 1}
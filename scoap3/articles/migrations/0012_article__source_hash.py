@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0011_alter_articleidentifier_article_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="_source_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+    ]
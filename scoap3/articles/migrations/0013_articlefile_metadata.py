@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0012_article__source_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="articlefile",
+            name="checksum",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="articlefile",
+            name="content_type",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="articlefile",
+            name="size",
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
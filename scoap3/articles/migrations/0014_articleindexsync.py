@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0013_articlefile_metadata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleIndexSync",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=255, unique=True)),
+                ("started_at", models.DateTimeField()),
+                ("indexed", models.PositiveIntegerField(default=0)),
+                ("finished_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0014_articleindexsync"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="article",
+            old_name="_source_hash",
+            new_name="_import_source_hash",
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="_affiliations_source_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import hashlib
+import mimetypes
+
 from django.db import models
 from django.db.models.fields.files import FieldFile
 
@@ -24,6 +27,23 @@ class CustomFileField(models.FileField):
     attr_class = CustomFieldFile
 
 
+def file_metadata(file, name):
+    """Return the size, ``md5:`` checksum and content type of the open ``file``."""
+    checksum = hashlib.md5()
+    size = 0
+    for chunk in file.chunks():
+        checksum.update(chunk)
+        size += len(chunk)
+    content_type = getattr(file, "content_type", None)
+    if not content_type:
+        content_type, _ = mimetypes.guess_type(name)
+    return {
+        "size": size,
+        "checksum": f"md5:{checksum.hexdigest()}",
+        "content_type": content_type or "",
+    }
+
+
 class Article(models.Model):
     reception_date = models.DateField(blank=True, null=True)
     acceptance_date = models.DateField(blank=True, null=True)
@@ -41,22 +61,51 @@ class Article(models.Model):
     )
     _created_at = models.DateTimeField(auto_now_add=True)
     _updated_at = models.DateTimeField(auto_now=True)
+    _import_source_hash = models.CharField(
+        max_length=64, blank=True, default="", editable=False
+    )
+    _affiliations_source_hash = models.CharField(
+        max_length=64, blank=True, default="", editable=False
+    )
 
     class Meta:
         ordering = ["id"]
 
+    def save(self, *args, keep_source_hashes=False, **kwargs):
+        if not keep_source_hashes:
+            # Edited outside of an import, the next import writes it again.
+            self._import_source_hash = self._affiliations_source_hash = ""
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {
+                    *kwargs["update_fields"],
+                    "_import_source_hash",
+                    "_affiliations_source_hash",
+                }
+        super().save(*args, **kwargs)
+
 
 class ArticleFile(models.Model):
     article_id = models.ForeignKey(
         "articles.Article", on_delete=models.CASCADE, related_name="related_files"
     )
     file = CustomFileField(upload_to=article_file_upload_path)
+    size = models.PositiveBigIntegerField(blank=True, null=True, editable=False)
+    checksum = models.CharField(max_length=255, blank=True, default="", editable=False)
+    content_type = models.CharField(
+        max_length=255, blank=True, default="", editable=False
+    )
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.file.name
 
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # A new upload, read while it is still local.
+            self.__dict__.update(file_metadata(self.file.file, self.file.name))
+        super().save(*args, **kwargs)
+
 
 class ArticleIdentifier(models.Model):
     article_id = models.ForeignKey(
@@ -75,3 +124,10 @@ class ArticleIdentifier(models.Model):
         indexes = [
             models.Index(fields=["article_id", "identifier_type", "identifier_value"])
         ]
+
+
+class ArticleIndexSync(models.Model):
+    task = models.CharField(max_length=255, unique=True)
+    started_at = models.DateTimeField()
+    indexed = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField()
@@ -0,0 +1,106 @@
+import threading
+
+from django.db import models, transaction
+from django_opensearch_dsl.apps import DODConfig
+from django_opensearch_dsl.signals import BaseSignalProcessor
+
+from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.articles.tasks import index_articles
+from scoap3.misc.models import (
+    ArticleArxivCategory,
+    License,
+    PublicationInfo,
+    RelatedMaterial,
+)
+
+# Models indexed as part of an article, with the attribute holding its id.
+ARTICLE_FOREIGN_KEYS = {
+    ArticleFile: "article_id_id",
+    ArticleIdentifier: "article_id_id",
+    ArticleArxivCategory: "article_id_id",
+    PublicationInfo: "article_id_id",
+}
+
+# Models indexed as part of many articles, with the accessor of their articles.
+ARTICLE_MANY_TO_MANY = {
+    License: "related_licenses",
+    RelatedMaterial: "related_articles",
+}
+
+
+class QueuedSignalProcessor(BaseSignalProcessor):
+    """Queue the ids of changed articles and index them in a Celery task.
+
+    Ids are collected per thread and sent as a single ``index_articles`` task
+    once the transaction commits, so an article saved many times in one
+    transaction is indexed once and requests never wait for OpenSearch.
+    """
+
+    def setup(self):
+        self._local = threading.local()
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.pre_delete.connect(self.handle_pre_delete)
+        models.signals.post_delete.connect(self.handle_delete)
+        models.signals.m2m_changed.connect(self.handle_m2m_changed)
+
+    def teardown(self):
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.pre_delete.disconnect(self.handle_pre_delete)
+        models.signals.post_delete.disconnect(self.handle_delete)
+        models.signals.m2m_changed.disconnect(self.handle_m2m_changed)
+
+    def handle_m2m_changed(self, sender, instance, action, model, pk_set, **kwargs):
+        if action not in ("post_add", "post_remove", "pre_clear"):
+            return
+        if isinstance(instance, Article):
+            self.enqueue([instance.pk])
+        elif model is Article and action == "pre_clear":
+            # A clear from the related side does not tell which articles.
+            self.enqueue(self._article_ids(type(instance), instance))
+        elif model is Article and pk_set:
+            self.enqueue(pk_set)
+
+    def handle_save(self, sender, instance, **kwargs):
+        self.enqueue(self._article_ids(sender, instance))
+
+    def handle_pre_delete(self, sender, instance, **kwargs):
+        # The links to the articles are gone once the instance is deleted.
+        if sender in ARTICLE_MANY_TO_MANY:
+            self.enqueue(self._article_ids(sender, instance))
+
+    def handle_delete(self, sender, instance, **kwargs):
+        if sender not in ARTICLE_MANY_TO_MANY:
+            self.enqueue(self._article_ids(sender, instance))
+
+    @staticmethod
+    def _article_ids(sender, instance):
+        if sender is Article:
+            return [instance.pk]
+        if sender in ARTICLE_FOREIGN_KEYS:
+            return [getattr(instance, ARTICLE_FOREIGN_KEYS[sender])]
+        if sender in ARTICLE_MANY_TO_MANY:
+            articles = getattr(instance, ARTICLE_MANY_TO_MANY[sender])
+            return articles.values_list("pk", flat=True)
+        return []
+
+    def enqueue(self, article_ids):
+        if not DODConfig.autosync_enabled():
+            return
+        pending = self._pending()
+        pending.update(article_ids)
+        if pending:
+            # Every change registers a callback, the first one to run sends
+            # the whole batch. Ids of rolled back changes are sent with the
+            # next batch, which is harmless as the task reads the database.
+            transaction.on_commit(self.flush)
+
+    def flush(self):
+        article_ids = self._pending()
+        self._local.pending = set()
+        if article_ids:
+            index_articles.delay(sorted(article_ids))
+
+    def _pending(self):
+        if not hasattr(self._local, "pending"):
+            self._local.pending = set()
+        return self._local.pending
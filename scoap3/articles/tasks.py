@@ -0,0 +1,377 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+from celery import group
+from django.core.files.storage import storages
+from django.db.models import Max, Min, Q
+from django.utils.dateparse import parse_datetime
+from opensearchpy.helpers import bulk
+from sentry_sdk import capture_exception
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+from config import celery_app
+from scoap3.articles.cache import bump_search_generation
+from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.models import Article, ArticleFile, ArticleIndexSync, file_metadata
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task()
+def index_articles(article_ids):
+    """Bring the search index in line with the database for ``article_ids``.
+
+    Existing articles are indexed, the ones that no longer exist are removed.
+    """
+    document = ArticleDocument()
+    articles = document.get_queryset(filter_=Q(pk__in=article_ids))
+    document.update(articles, "index")
+
+    deleted = set(article_ids) - {article.pk for article in articles}
+    if deleted:
+        document.update(
+            [Article(pk=pk) for pk in deleted], "delete", raise_on_error=False
+        )
+
+
+@celery_app.task()
+def reindex_updated_articles(since=None, overlap=300):
+    """Index the articles updated since ``since``.
+
+    Defaults to the start of the last successful run, minus ``overlap``
+    seconds to catch transactions that committed after it started.
+    Reindexes every article when no run has succeeded yet.
+    """
+    started_at = datetime.now(timezone.utc)
+    incremental = since is None
+    if incremental:
+        since = (
+            ArticleIndexSync.objects.filter(task=reindex_updated_articles.name)
+            .values_list("started_at", flat=True)
+            .first()
+        )
+        if since is not None:
+            since -= timedelta(seconds=overlap)
+    elif isinstance(since, str):
+        since = parse_datetime(since)
+
+    document = ArticleDocument()
+    articles = document.get_indexing_queryset(
+        filter_=Q(_updated_at__gte=since) if since else None
+    )
+    indexed, _ = document.update(articles, "index", refresh=False)
+    document._index.refresh()
+    bump_search_generation()
+    if incremental:
+        ArticleIndexSync.objects.update_or_create(
+            task=reindex_updated_articles.name,
+            defaults={
+                "started_at": started_at,
+                "indexed": indexed,
+                "finished_at": datetime.now(timezone.utc),
+            },
+        )
+    return indexed
+
+
+def _index_generations(client, alias):
+    return sorted(
+        name
+        for name in client.indices.get(index=f"{alias}-*")
+        if name.removeprefix(f"{alias}-").isdigit()
+    )
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@celery_app.task()
+def index_article_range(
+    lower=None, upper=None, index_name=None, chunk_size=500, max_retries=3
+):
+    """Index the articles with ``lower <= id < upper`` in bulk requests.
+
+    Documents rejected because the cluster is overloaded are sent again with
+    an exponential backoff, up to ``max_retries`` times. Returns the number of
+    indexed documents, retries, failed documents and the seconds it took.
+    """
+    started = time.monotonic()
+    document = ArticleDocument()
+    client = ArticleDocument._get_connection()
+    live = index_name is None
+    index_name = index_name or ArticleDocument._index._name
+
+    filter_ = Q()
+    if lower is not None:
+        filter_ &= Q(pk__gte=lower)
+    if upper is not None:
+        filter_ &= Q(pk__lt=upper)
+    articles = document.get_indexing_queryset(filter_=filter_ or None)
+
+    stats = {"indexed": 0, "retries": 0, "errors": []}
+    for chunk in _chunks(articles, chunk_size):
+        actions = [
+            {
+                "_index": index_name,
+                "_id": article.pk,
+                "_source": document.prepare(article),
+            }
+            for article in chunk
+        ]
+        for attempt in range(max_retries + 1):
+            indexed, errors = bulk(
+                client, actions, chunk_size=len(actions), raise_on_error=False
+            )
+            stats["indexed"] += indexed
+            rejected = set()
+            for error in errors:
+                (item,) = error.values()
+                if item.get("status") == 429 and attempt < max_retries:
+                    rejected.add(str(item["_id"]))
+                else:
+                    stats["errors"].append(
+                        {"id": item["_id"], "status": item.get("status")}
+                    )
+            actions = [action for action in actions if str(action["_id"]) in rejected]
+            if not actions:
+                break
+            stats["retries"] += 1
+            time.sleep(2**attempt)
+
+    if live:
+        client.indices.refresh(index=index_name)
+        bump_search_generation()
+    stats["seconds"] = time.monotonic() - started
+    return stats
+
+
+def article_id_ranges(count):
+    """Split the article ids into ``count`` ranges of similar width."""
+    bounds = Article.objects.aggregate(lowest=Min("pk"), highest=Max("pk"))
+    if bounds["lowest"] is None:
+        return []
+    lowest, highest = bounds["lowest"], bounds["highest"] + 1
+    step = -(-(highest - lowest) // count)
+    return [
+        (lower, min(lower + step, highest)) for lower in range(lowest, highest, step)
+    ]
+
+
+def index_articles_parallel(workers, index_name=None, chunk_size=500):
+    """Index all articles with ``workers`` Celery tasks, one per id range.
+
+    Waits for the tasks and returns their combined statistics, timed from
+    dispatch to the last task finishing. Not meant to be called from a task.
+    """
+    started = time.monotonic()
+    result = group(
+        index_article_range.s(lower, upper, index_name, chunk_size)
+        for lower, upper in article_id_ranges(workers)
+    ).apply_async()
+    ranges = result.get()
+    return {
+        "indexed": sum(stats["indexed"] for stats in ranges),
+        "retries": sum(stats["retries"] for stats in ranges),
+        "errors": [error for stats in ranges for error in stats["errors"]],
+        "seconds": time.monotonic() - started,
+    }
+
+
+def create_articles_index(started_at):
+    """Create an empty generation of the articles index, tuned for bulk loads."""
+    name = f"{ArticleDocument._index._name}-{started_at:%Y%m%d%H%M%S}"
+    index = ArticleDocument._index.clone(name=name)
+    index.settings(number_of_replicas=0, refresh_interval="-1")
+    index.create()
+    return name
+
+
+def swap_articles_index(name, started_at, keep=1):
+    """Point the articles alias at the index ``name`` built since ``started_at``.
+
+    Restores the replicas and refreshes of ``name`` first. Articles updated
+    during the build are indexed again afterwards and all but ``keep``
+    previous generations are deleted.
+    """
+    alias = ArticleDocument._index._name
+    client = ArticleDocument._get_connection()
+    replicas = ArticleDocument._index._settings.get("number_of_replicas", 1)
+    client.indices.put_settings(
+        index=name,
+        body={"index": {"number_of_replicas": replicas, "refresh_interval": None}},
+    )
+    client.indices.refresh(index=name)
+
+    actions = [{"add": {"index": name, "alias": alias}}]
+    if client.indices.exists_alias(name=alias):
+        actions += [
+            {"remove": {"index": old, "alias": alias}}
+            for old in client.indices.get_alias(name=alias)
+        ]
+    elif client.indices.exists(index=alias):
+        # An index created before aliases were used, replaced in the same swap.
+        actions.append({"remove_index": {"index": alias}})
+    client.indices.update_aliases(body={"actions": actions})
+    bump_search_generation()
+
+    reindex_updated_articles(since=started_at)
+
+    previous = [old for old in _index_generations(client, alias) if old != name]
+    for old in previous[: max(len(previous) - keep, 0)]:
+        client.indices.delete(index=old)
+
+
+@celery_app.task()
+def rebuild_articles_index(keep=1, chunk_size=500):
+    """Build a new generation of the articles index and swap it in.
+
+    Searches are served from the previous generation until the swap.
+    Returns the name of the new index.
+    """
+    started_at = datetime.now(tz=timezone.utc)
+    name = create_articles_index(started_at)
+    index_article_range(index_name=name, chunk_size=chunk_size)
+    swap_articles_index(name, started_at, keep=keep)
+    return name
+
+
+def _stored_file_metadata(article_file):
+    name = article_file.file.name
+    try:
+        with article_file.file.storage.open(name, "rb") as file:
+            return article_file.pk, file_metadata(file, name)
+    except FileNotFoundError:
+        return article_file.pk, None
+
+
+def backfill_article_file_metadata(workers=8, batch_size=500, force=False):
+    """Store the size, checksum and content type of the article files.
+
+    Files are read from the storage by ``workers`` threads, only those without
+    a size unless ``force``. Returns the number of updated files and the ids
+    of the ones missing from the storage.
+    """
+    files = ArticleFile.objects.only("pk", "file").order_by("pk")
+    if not force:
+        files = files.filter(size__isnull=True)
+
+    stats = {"updated": 0, "missing": []}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk in _chunks(files.iterator(chunk_size=batch_size), batch_size):
+            updated = []
+            for pk, metadata in executor.map(_stored_file_metadata, chunk):
+                if metadata is None:
+                    stats["missing"].append(pk)
+                else:
+                    updated.append(ArticleFile(pk=pk, **metadata))
+            ArticleFile.objects.bulk_update(
+                updated, ["size", "checksum", "content_type"]
+            )
+            stats["updated"] += len(updated)
+    return stats
+
+
+def _copy_file(source, target, name, checksum=""):
+    """Copy ``name`` from the ``source`` storage to ``target``.
+
+    Between S3 buckets the copy is done server side, in parts for big files,
+    and None is returned. Otherwise the file is streamed, in a multipart
+    upload for big files on S3, and its metadata returned. Streamed files not
+    matching ``checksum`` raise a ``ValueError`` before anything is written.
+    """
+    if isinstance(source, S3Storage) and isinstance(target, S3Storage):
+        target.bucket.copy(
+            {
+                "Bucket": source.bucket_name,
+                "Key": source._normalize_name(clean_name(name)),
+            },
+            target._normalize_name(clean_name(name)),
+            Config=target.transfer_config,
+        )
+        return None
+    with source.open(name, "rb") as file:
+        metadata = file_metadata(file, name)
+        if checksum and metadata["checksum"] != checksum:
+            raise ValueError(
+                f"Checksum of {name} is {metadata['checksum']}, expected {checksum}"
+            )
+        if target.exists(name):
+            target.delete(name)
+        target.save(name, file)
+    return metadata
+
+
+def _migrate_file(source, target, force, article_file):
+    name = article_file.file.name
+    try:
+        if (
+            not force
+            and article_file.size is not None
+            and target.exists(name)
+            and target.size(name) == article_file.size
+        ):
+            return article_file.pk, "skipped", None
+        if not source.exists(name):
+            return article_file.pk, "missing", None
+
+        metadata = _copy_file(source, target, name, article_file.checksum)
+        if metadata is None and article_file.checksum:
+            # Server side copies keep the checksum of the legacy metadata.
+            metadata = {
+                "size": target.size(name),
+                "checksum": article_file.checksum,
+                "content_type": article_file.content_type,
+            }
+        elif metadata is None:
+            with target.open(name, "rb") as file:
+                metadata = file_metadata(file, name)
+        return article_file.pk, "copied", metadata
+    except Exception as e:
+        logger.exception("Copying %s failed", name)
+        capture_exception(e)
+        return article_file.pk, "failed", None
+
+
+def migrate_article_files(
+    source="legacy-files", workers=8, batch_size=500, force=False
+):
+    """Copy the article files from the ``source`` storage to the default one.
+
+    Files are copied by ``workers`` threads and their metadata saved in bulk
+    updates. Files already copied with the expected size are skipped, so an
+    interrupted migration resumes where it stopped. Returns the number of
+    copied and skipped files and the ids of the missing and failed ones.
+    """
+    migrate = partial(_migrate_file, storages[source], storages["default"], force)
+    files = ArticleFile.objects.only(
+        "pk", "file", "size", "checksum", "content_type"
+    ).order_by("pk")
+
+    stats = {"copied": 0, "skipped": 0, "missing": [], "failed": []}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk in _chunks(files.iterator(chunk_size=batch_size), batch_size):
+            copied = []
+            for pk, status, metadata in executor.map(migrate, chunk):
+                if status == "copied":
+                    copied.append(ArticleFile(pk=pk, **metadata))
+                elif status == "skipped":
+                    stats["skipped"] += 1
+                else:
+                    stats[status].append(pk)
+            ArticleFile.objects.bulk_update(
+                copied, ["size", "checksum", "content_type"]
+            )
+            stats["copied"] += len(copied)
+    return stats
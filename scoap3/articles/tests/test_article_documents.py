@@ -0,0 +1,95 @@
+import pytest
+from django_opensearch_dsl import Document
+from opensearchpy.helpers.utils import AttrDict
+
+from scoap3.articles.api.serializers import SearchCSVSerializer
+from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.models import Article, ArticleIdentifier
+from scoap3.misc.models import ArticleArxivCategory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    "single, refresh, expected",
+    [
+        (True, None, "wait_for"),
+        (True, False, False),
+        (False, None, None),
+        (False, False, False),
+    ],
+)
+def test_update_refresh(monkeypatch, articles, single, refresh, expected):
+    calls = []
+    monkeypatch.setattr(
+        Document, "update", lambda self, *args, **kwargs: calls.append(kwargs)
+    )
+    thing = articles[0] if single else articles
+
+    ArticleDocument().update(thing, "index", refresh=refresh)
+
+    assert calls == [{"refresh": expected}]
+
+
+def test_prepare_reads_prefetched_relations(articles, django_assert_num_queries):
+    document = ArticleDocument()
+    expected = [document.prepare(article) for article in articles]
+
+    with django_assert_num_queries(8):
+        prepared = [
+            document.prepare(article)
+            for article in document.get_indexing_queryset(verbose=False)
+        ]
+
+    assert prepared == expected
+    assert prepared[0]["related_licenses"] == [
+        {"url": "https://creativecommons.org", "name": "CC-BY"}
+    ]
+    assert prepared[0]["article_identifiers"] == [
+        {"identifier_type": "DOI", "identifier_value": "10.1/0"}
+    ]
+    assert prepared[0]["publication_info"][0]["journal_title"] == "JHEP"
+
+
+def test_prepare_denormalized_fields(articles):
+    ArticleIdentifier.objects.create(
+        article_id=articles[0], identifier_type="arXiv", identifier_value="2301.1"
+    )
+    ArticleArxivCategory.objects.create(
+        article_id=articles[0], category="hep-ph", primary=False
+    )
+    article = ArticleDocument().get_queryset().get(pk=articles[0].pk)
+
+    prepared = ArticleDocument().prepare(article)
+
+    assert prepared["doi"] == "10.1/0"
+    assert prepared["arxiv_id"] == "2301.1"
+    assert prepared["arxiv_primary_category"] == "hep-th"
+    assert prepared["journal"] == "JHEP"
+    assert prepared["created_date"] == article._created_at.date()
+
+
+def test_csv_serializer_projects_source(articles):
+    article = Article.objects.create(title="Bare", publication_date="2023-01-02")
+    document = ArticleDocument()
+    hits = [
+        AttrDict(document.prepare(instance))
+        for instance in document.get_queryset().filter(
+            pk__in=[articles[0].pk, article.pk]
+        )
+    ]
+
+    rows = SearchCSVSerializer(hits, many=True).data
+
+    assert rows[0] == {
+        "id": articles[0].pk,
+        "title": "Title 0",
+        "doi": "10.1/0",
+        "arxiv_id": None,
+        "arxiv_primary_category": "hep-th",
+        "journal": "JHEP",
+        "publication_date": None,
+        "_created_at": str(articles[0]._created_at.date()),
+    }
+    assert rows[1]["doi"] is None
+    assert str(rows[1]["publication_date"]) == "2023-01-02"
@@ -2,6 +2,13 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 
+from scoap3 import tasks
+from scoap3.articles.models import Article
+from scoap3.authors.models import Author
+from scoap3.misc import cache
+from scoap3.misc.models import Affiliation, Publisher
+from scoap3.tests.factories import legacy_record
+
 pytestmark = pytest.mark.django_db
 
 
@@ -11,6 +18,148 @@ class TestArticleViewSet:
         response = client.get(url)
         assert response.status_code == status.HTTP_200_OK
 
+    @pytest.mark.parametrize("articles", [1, 10], indirect=True)
+    def test_list_queries_do_not_grow_with_articles(
+        self, client, django_assert_num_queries, articles
+    ):
+        # The request savepoint, the count, the articles and their 6 relations.
+        with django_assert_num_queries(10):
+            response = client.get(reverse("api:article-list"))
+
+        results = response.json()["results"]
+        assert len(results) == len(articles)
+        assert results[0]["publication_info"][0]["journal_title"] == "JHEP"
+
+    @pytest.mark.parametrize("articles", [1], indirect=True)
+    def test_retrieve_queries(self, client, django_assert_num_queries, articles):
+        (article,) = articles
+
+        with django_assert_num_queries(9):
+            response = client.get(
+                reverse("api:article-detail", kwargs={"pk": article.pk})
+            )
+
+        assert response.json()["related_licenses"] == [
+            article.related_licenses.get().pk
+        ]
+
+    def test_bulk_import(self, client, user):
+        client.force_login(user)
+        url = reverse("api:article-bulk")
+        records = [legacy_record(1), legacy_record(2)]
+
+        created = client.post(url, records, content_type="application/json")
+        records[1]["titles"] = [{"title": "Updated"}]
+        updated = client.post(url, records, content_type="application/json")
+
+        assert created.status_code == status.HTTP_200_OK
+        assert created.json()["results"] == [
+            {"control_number": 1, "status": "created"},
+            {"control_number": 2, "status": "created"},
+        ]
+        assert updated.json()["results"] == [
+            {"control_number": 1, "status": "unchanged"},
+            {"control_number": 2, "status": "updated"},
+        ]
+        assert Article.objects.get(pk=2).title == "Updated"
+        assert Author.objects.filter(article_id=1).exists()
+        assert Affiliation.objects.exists()
+
+    def test_bulk_import_reports_failed_records(self, client, user, monkeypatch):
+        client.force_login(user)
+        reported = []
+        monkeypatch.setattr(tasks, "capture_exception", reported.append)
+        broken = legacy_record(2)
+        broken["publication_info"][0]["journal_title"] = "J" * 300
+
+        response = client.post(
+            reverse("api:article-bulk"),
+            [legacy_record(1), broken],
+            content_type="application/json",
+        )
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert response.json()["results"] == [
+            {"control_number": 1, "status": "created"},
+            {
+                "control_number": 2,
+                "status": "failed",
+                "error": "The record could not be imported.",
+            },
+        ]
+        assert list(Article.objects.values_list("pk", flat=True)) == [1]
+        assert not reported
+
+    def test_bulk_import_ignores_stale_cached_rows(self, client, user):
+        client.force_login(user)
+        publisher = Publisher.objects.create(name="Springer")
+        cache.publishers.warm()
+        publisher.delete()
+
+        client.post(
+            reverse("api:article-bulk"),
+            [legacy_record(1)],
+            content_type="application/json",
+        )
+
+        publication_info = Article.objects.get(pk=1).publication_info.get()
+        assert publication_info.publisher.name == "Springer"
+
+    def test_bulk_import_one_record(self, client, user):
+        client.force_login(user)
+
+        response = client.post(
+            reverse("api:article-bulk"),
+            legacy_record(1),
+            content_type="application/json",
+        )
+
+        assert response.json()["results"] == [
+            {"control_number": 1, "status": "created"}
+        ]
+
+    @pytest.mark.parametrize(
+        "records",
+        [
+            [],
+            [{"titles": []}],
+            [legacy_record(1)] * 2,
+            [legacy_record(1, license=None)],
+            [legacy_record(1, imprints=[{"date": "June", "publisher": "Springer"}])],
+        ],
+    )
+    def test_bulk_import_rejects_invalid_records(self, client, user, records):
+        client.force_login(user)
+
+        response = client.post(
+            reverse("api:article-bulk"), records, content_type="application/json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Article.objects.exists()
+
+    def test_bulk_import_reports_errors_per_record(self, client, user):
+        client.force_login(user)
+
+        response = client.post(
+            reverse("api:article-bulk"),
+            [legacy_record(1), legacy_record(2, titles=[])],
+            content_type="application/json",
+        )
+
+        errors = response.json()["records"]
+        assert errors[0] == {}
+        assert list(errors[1]) == ["titles"]
+
+    def test_bulk_import_needs_authentication(self, client):
+        response = client.post(
+            reverse("api:article-bulk"),
+            [legacy_record(1)],
+            content_type="application/json",
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
 
 class TestArticleIdentifierViewSet:
     def test_get_article_identifier(self, client):
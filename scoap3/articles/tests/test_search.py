@@ -1,7 +1,28 @@
+import copy
+import csv
+import inspect
+import io
+from functools import cmp_to_key
+
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
+from django_opensearch_dsl import Document
+from opensearch_dsl.connections import connections
+from opensearchpy import OpenSearch
 from rest_framework import status
 
+from scoap3.articles.api.views import ArticleDocumentView
+from scoap3.articles.cache import search_generation
+from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.models import Article
+from scoap3.utils.pagination import OSCursorPagination
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
 
 @pytest.mark.django_db
 @pytest.mark.usefixtures("rebuild_opensearch_index")
@@ -9,3 +30,252 @@ def test_article_search(user, client):
     client.force_login(user)
     response = client.get(reverse("search:article-list"))
     assert response.status_code == status.HTTP_200_OK
+
+
+def _compare(left, right, descending):
+    for a, b, desc in zip(left, right, descending):
+        if a != b:
+            return (a > b) != desc
+    return False
+
+
+class FakeSearchClient:
+    def __init__(self, sources):
+        self.sources = sources
+        self.bodies = []
+        self.pits = set()
+
+    def create_point_in_time(self, index=None, params=None, headers=None):
+        self.pits.add("pit")
+        return {"pit_id": "pit"}
+
+    def delete_point_in_time(self, body=None, all=False, params=None, headers=None):
+        self.pits.difference_update(body["pit_id"])
+
+    def search(self, body, index=None, **params):
+        self.bodies.append(copy.deepcopy(body))
+        fields, descending = [], []
+        for sort in body["sort"]:
+            field, order = (
+                next(iter(sort.items())) if isinstance(sort, dict) else (sort, "asc")
+            )
+            fields.append(field.removesuffix(".keyword"))
+            descending.append(order in ("desc", {"order": "desc"}))
+        hits = [
+            {
+                "_id": str(source["id"]),
+                "_index": "articles",
+                "_source": {
+                    field: source.get(field) for field in body.get("_source", source)
+                },
+                "sort": [str(source[field]) for field in fields],
+            }
+            for source in self.sources
+        ]
+        hits = sorted(
+            hits,
+            key=cmp_to_key(
+                lambda a, b: -1 if _compare(b["sort"], a["sort"], descending) else 1
+            ),
+        )
+        if "search_after" in body:
+            hits = [
+                hit
+                for hit in hits
+                if _compare(hit["sort"], body["search_after"], descending)
+            ]
+        return {
+            "pit_id": "pit",
+            "hits": {"total": {"value": len(hits)}, "hits": hits[: body["size"]]},
+        }
+
+
+@pytest.mark.parametrize(
+    "name, kwargs",
+    [
+        ("create_point_in_time", {"index": "articles", "params": {"keep_alive": "1m"}}),
+        ("search", {"body": {"pit": {"id": "pit", "keep_alive": "1m"}}}),
+        ("delete_point_in_time", {"body": {"pit_id": ["pit"]}}),
+    ],
+)
+def test_fake_search_client_matches_opensearch_client(name, kwargs):
+    # The calls ``search_after_hits`` makes must fit both clients.
+    for client in [OpenSearch, FakeSearchClient]:
+        inspect.signature(getattr(client, name)).bind(None, **kwargs)
+
+
+@pytest.mark.django_db
+def test_article_export_streams_all_pages(user, client, monkeypatch):
+    sources = [
+        {
+            "id": i,
+            "title": f"Title {i}",
+            "doi": f"10.1/{i}",
+            "journal": "JHEP",
+            "publication_date": "2023-01-02",
+            "created_date": "2023-02-03",
+            "abstract": "Not exported",
+        }
+        for i in range(1, 6)
+    ]
+    search_client = FakeSearchClient(sources)
+    monkeypatch.setitem(connections._conns, "default", search_client)
+    monkeypatch.setattr(ArticleDocumentView, "export_page_size", 2)
+    client.force_login(user)
+
+    response = client.get(reverse("search:article-export"), {"search": "Title"})
+    rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+
+    assert response["Content-Type"] == "text/csv"
+    assert rows[0] == [
+        "ID",
+        "Title",
+        "DOI",
+        "arXiv id",
+        "arXiv primary category",
+        "Journal",
+        "Publication Date",
+        "Record creation date",
+    ]
+    assert rows[1] == [
+        "1",
+        "Title 1",
+        "10.1/1",
+        "",
+        "",
+        "JHEP",
+        "2023-01-02",
+        "2023-02-03",
+    ]
+    assert [row[0] for row in rows[1:]] == ["1", "2", "3", "4", "5"]
+    assert len(search_client.bodies) == 4
+    assert "aggs" not in search_client.bodies[0]
+    assert "abstract" not in search_client.bodies[0]["_source"]
+    assert search_client.bodies[0]["query"]
+    assert search_client.bodies[-1]["search_after"] == ["5"]
+    assert not search_client.pits
+
+
+@pytest.mark.django_db
+def test_article_search_cursor_pagination(user, client, monkeypatch):
+    document = ArticleDocument()
+    articles = [
+        Article.objects.create(
+            id=i, title=f"Title {i}", publication_date=f"2023-01-0{i % 3 + 1}"
+        )
+        for i in range(1, 6)
+    ]
+    search_client = FakeSearchClient(
+        [document.prepare(article) for article in articles]
+    )
+    monkeypatch.setitem(connections._conns, "default", search_client)
+    client.force_login(user)
+
+    pages = []
+    url = reverse("search:article-list") + "?cursor=&page_size=2&count=true"
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.json())
+        url = pages[-1]["next"]
+
+    assert [[hit["id"] for hit in page["results"]] for page in pages] == [
+        [2, 5],
+        [1, 4],
+        [3],
+    ]
+    assert pages[0]["count"] == 5
+    assert search_client.bodies[0]["size"] == 3
+    assert search_client.bodies[0]["track_total_hits"] is True
+    assert "search_after" not in search_client.bodies[0]
+    assert "aggs" in search_client.bodies[0]
+    assert search_client.bodies[1]["search_after"] == ["2023-01-03", "5"]
+    assert "aggs" not in search_client.bodies[1]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        OSCursorPagination().encode_cursor({"id": "1"}),
+        OSCursorPagination().encode_cursor(["1"]),
+        OSCursorPagination().encode_cursor([1672531200000, "1", "2"]),
+        OSCursorPagination().encode_cursor([{"date": 1}, "1"]),
+        OSCursorPagination().encode_cursor([1672531200000, 1]),
+        OSCursorPagination().encode_cursor([True, "1"]),
+    ],
+)
+def test_article_search_invalid_cursor(user, client, cursor):
+    client.force_login(user)
+
+    response = client.get(reverse("search:article-list"), {"cursor": cursor})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"cursor": ["Invalid cursor"]}
+
+
+@pytest.mark.django_db
+def test_article_search_is_cached_until_the_index_changes(user, client, monkeypatch):
+    article = Article.objects.create(id=1, title="Title")
+    search_client = FakeSearchClient([ArticleDocument().prepare(article)])
+    monkeypatch.setitem(connections._conns, "default", search_client)
+    updates = []
+    monkeypatch.setattr(
+        Document, "update", lambda self, *args, **kwargs: updates.append(kwargs)
+    )
+    client.force_login(user)
+    url = reverse("search:article-list")
+
+    first = client.get(url, {"cursor": "", "page_size": 5}).json()
+    second = client.get(url + "?page_size=5&cursor=").json()
+    generation = search_generation()
+    ArticleDocument().update(article, "index")
+    third = client.get(url, {"cursor": "", "page_size": 5}).json()
+
+    assert first == second == third
+    assert search_generation() == generation + 1
+    assert updates == [{"refresh": "wait_for"}]
+    assert len(search_client.bodies) == 2
+
+
+@pytest.mark.django_db
+def test_article_search_is_not_cached_without_timeout(
+    user, client, monkeypatch, settings
+):
+    settings.SEARCH_CACHE_TIMEOUT = 0
+    article = Article.objects.create(id=1, title="Title")
+    search_client = FakeSearchClient([ArticleDocument().prepare(article)])
+    monkeypatch.setitem(connections._conns, "default", search_client)
+    client.force_login(user)
+    url = reverse("search:article-list")
+
+    client.get(url, {"cursor": "", "page_size": 5})
+    client.get(url, {"cursor": "", "page_size": 5})
+
+    assert len(search_client.bodies) == 2
+
+
+@pytest.mark.django_db
+def test_article_search_projects_requested_fields(user, client, monkeypatch):
+    article = Article.objects.create(id=1, title="Title", abstract="Abstract")
+    search_client = FakeSearchClient([ArticleDocument().prepare(article)])
+    monkeypatch.setitem(connections._conns, "default", search_client)
+    client.force_login(user)
+
+    response = client.get(
+        reverse("search:article-list"), {"cursor": "", "fields": "id, title"}
+    )
+
+    assert response.json()["results"] == [{"id": 1, "title": "Title"}]
+    assert search_client.bodies[0]["_source"] == ["id", "title"]
+
+
+@pytest.mark.django_db
+def test_article_search_rejects_unknown_fields(user, client):
+    client.force_login(user)
+
+    response = client.get(reverse("search:article-list"), {"fields": "id,secret"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"fields": ["Unknown fields: secret"]}
@@ -0,0 +1,101 @@
+import pytest
+
+from scoap3.articles import signals
+from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.models import Article, ArticleIdentifier
+from scoap3.articles.tasks import index_articles
+from scoap3.misc.models import License
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def indexed(settings, monkeypatch):
+    settings.OPENSEARCH_DSL_AUTOSYNC = True
+    calls = []
+    monkeypatch.setattr(signals.index_articles, "delay", calls.append)
+    return calls
+
+
+def test_changes_are_indexed_once_per_transaction(
+    indexed, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        article = Article.objects.create(title="Title")
+        ArticleIdentifier.objects.create(
+            article_id=article, identifier_type="DOI", identifier_value="10.1/1"
+        )
+        article.related_licenses.add(License.objects.create(name="CC-BY"))
+        article.title = "Updated"
+        article.save()
+        other = Article.objects.create(title="Other")
+
+    assert indexed == [sorted([article.pk, other.pk])]
+
+
+def test_related_changes_reindex_their_articles(
+    indexed, django_capture_on_commit_callbacks
+):
+    license = License.objects.create(name="CC-BY")
+    articles = [Article.objects.create(title=f"Title {i}") for i in range(2)]
+    for article in articles:
+        article.related_licenses.add(license)
+    article_ids = [article.pk for article in articles]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        license.name = "CC-BY-4.0"
+        license.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        license.delete()
+    with django_capture_on_commit_callbacks(execute=True):
+        articles[0].delete()
+
+    assert indexed == [article_ids, article_ids, article_ids[:1]]
+
+
+@pytest.mark.parametrize("action", ["remove", "clear"])
+def test_related_side_m2m_changes_reindex_their_articles(
+    indexed, django_capture_on_commit_callbacks, action
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        license = License.objects.create(name="CC-BY")
+        articles = [Article.objects.create(title=f"Title {i}") for i in range(2)]
+        license.related_licenses.add(*articles)
+    indexed.clear()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        if action == "remove":
+            license.related_licenses.remove(*articles)
+        else:
+            license.related_licenses.clear()
+
+    assert indexed == [[article.pk for article in articles]]
+
+
+def test_changes_are_not_queued_without_autosync(
+    settings, monkeypatch, django_capture_on_commit_callbacks
+):
+    settings.OPENSEARCH_DSL_AUTOSYNC = False
+    calls = []
+    monkeypatch.setattr(signals.index_articles, "delay", calls.append)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Article.objects.create(title="Title")
+
+    assert calls == []
+
+
+def test_index_articles_removes_deleted_articles(monkeypatch):
+    updates = []
+    monkeypatch.setattr(
+        ArticleDocument,
+        "update",
+        lambda self, thing, action, **kwargs: updates.append(
+            (action, sorted(article.pk for article in thing))
+        ),
+    )
+    article = Article.objects.create(title="Title")
+
+    index_articles([article.pk, article.pk + 1])
+
+    assert updates == [("index", [article.pk]), ("delete", [article.pk + 1])]
@@ -0,0 +1,329 @@
+import fnmatch
+import hashlib
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from opensearchpy.connection.connections import connections
+from storages.backends.s3 import S3Storage
+
+from scoap3.articles import tasks
+from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.models import Article, ArticleFile, ArticleIndexSync
+
+pytestmark = pytest.mark.django_db
+
+NOW = datetime(2023, 9, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def updates(monkeypatch):
+    updates = []
+
+    def update(self, thing, action, **kwargs):
+        article_ids = sorted(article.pk for article in thing)
+        updates.append(article_ids)
+        return len(article_ids), []
+
+    monkeypatch.setattr(ArticleDocument, "update", update)
+    monkeypatch.setattr(ArticleDocument._index, "refresh", lambda **kwargs: None)
+    return updates
+
+
+@pytest.fixture
+def article_ids():
+    articles = [Article.objects.create(title=f"Title {i}") for i in range(3)]
+    for hours, article in zip([48, 1, 0], articles):
+        Article.objects.filter(pk=article.pk).update(
+            _updated_at=NOW - timedelta(hours=hours)
+        )
+    return [article.pk for article in articles]
+
+
+def _last_reindex(**fields):
+    return ArticleIndexSync.objects.create(
+        task=tasks.reindex_updated_articles.name,
+        started_at=NOW,
+        finished_at=NOW,
+        **fields,
+    )
+
+
+def test_reindex_from_last_reindex(updates, article_ids):
+    _last_reindex()
+
+    assert tasks.reindex_updated_articles(overlap=3600) == 2
+    assert updates == [article_ids[1:]]
+    sync = ArticleIndexSync.objects.get()
+    assert sync.started_at > NOW
+    assert sync.indexed == 2
+
+
+def test_reindex_does_not_depend_on_the_cache(updates, article_ids):
+    _last_reindex()
+    cache.clear()
+
+    tasks.reindex_updated_articles(overlap=3600)
+
+    assert updates == [article_ids[1:]]
+
+
+def test_reindex_everything_without_last_reindex(updates, article_ids):
+    assert tasks.reindex_updated_articles() == 3
+    assert updates == [article_ids]
+    assert ArticleIndexSync.objects.filter(indexed=3).exists()
+
+
+def test_failed_reindex_keeps_last_reindex(monkeypatch, article_ids):
+    def update(self, thing, action, **kwargs):
+        raise ConnectionError
+
+    monkeypatch.setattr(ArticleDocument, "update", update)
+    _last_reindex()
+
+    with pytest.raises(ConnectionError):
+        tasks.reindex_updated_articles()
+
+    assert ArticleIndexSync.objects.get().started_at == NOW
+
+
+def test_reindex_command_since(updates, article_ids):
+    call_command("reindex_updated_articles", since=NOW.isoformat())
+
+    assert updates == [article_ids[2:]]
+    assert not ArticleIndexSync.objects.exists()
+
+
+class FakeBulk:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.requests = []
+        self.index_names = set()
+
+    def __call__(self, client, actions, **kwargs):
+        self.requests.append([action["_id"] for action in actions])
+        self.index_names.update(action["_index"] for action in actions)
+        errors = [
+            {"index": {"_id": str(action["_id"]), "status": status}}
+            for action in actions
+            if (status := self.statuses.get(action["_id"], [200]).pop(0)) != 200
+        ]
+        return len(actions) - len(errors), errors
+
+
+class FakeIndices:
+    def __init__(self, indices):
+        self.indices = indices
+
+    def create(self, index, body, **kwargs):
+        self.indices[index] = {"aliases": set(), "settings": body["settings"]}
+
+    def put_settings(self, index, body):
+        self.indices[index]["settings"].update(body["index"])
+
+    def refresh(self, index):
+        pass
+
+    def get(self, index):
+        return {
+            name: self.indices[name]
+            for name in self.indices
+            if fnmatch.fnmatch(name, index)
+        }
+
+    def exists(self, index):
+        return index in self.indices
+
+    def exists_alias(self, name):
+        return bool(self.get_alias(name))
+
+    def get_alias(self, name):
+        return {
+            index: {}
+            for index, entry in self.indices.items()
+            if name in entry["aliases"]
+        }
+
+    def update_aliases(self, body):
+        for action in body["actions"]:
+            ((kind, params),) = action.items()
+            if kind == "add":
+                self.indices[params["index"]]["aliases"].add(params["alias"])
+            elif kind == "remove":
+                self.indices[params["index"]]["aliases"].remove(params["alias"])
+            else:
+                del self.indices[params["index"]]
+
+    def delete(self, index):
+        del self.indices[index]
+
+
+@pytest.fixture
+def opensearch(monkeypatch):
+    client = SimpleNamespace(indices=FakeIndices({}))
+    monkeypatch.setitem(connections._conns, "default", client)
+    return client.indices
+
+
+@pytest.mark.parametrize("previous", [[], ["20230101000000", "20230201000000"]])
+def test_rebuild_articles_index(
+    monkeypatch, opensearch, updates, article_ids, previous
+):
+    alias = ArticleDocument._index._name
+    opensearch.indices[alias] = {"aliases": set(), "settings": {}}
+    for suffix in previous:
+        opensearch.indices[f"{alias}-{suffix}"] = {"aliases": set(), "settings": {}}
+    if previous:
+        del opensearch.indices[alias]
+        opensearch.indices[f"{alias}-{previous[-1]}"]["aliases"].add(alias)
+    fake_bulk = FakeBulk({})
+    monkeypatch.setattr(tasks, "bulk", fake_bulk)
+
+    name = tasks.rebuild_articles_index()
+
+    assert sorted(opensearch.indices) == sorted(
+        [f"{alias}-{suffix}" for suffix in previous[-1:]] + [name]
+    )
+    assert opensearch.get_alias(alias) == {name: {}}
+    assert opensearch.indices[name]["settings"] == {
+        "number_of_shards": 1,
+        "number_of_replicas": 1,
+        "refresh_interval": None,
+    }
+    assert fake_bulk.index_names == {name}
+    assert fake_bulk.requests == [article_ids]
+
+
+def test_index_article_range_retries_rejected_documents(
+    monkeypatch, opensearch, article_ids
+):
+    fake_bulk = FakeBulk({article_ids[0]: [429, 429, 200], article_ids[1]: [400]})
+    monkeypatch.setattr(tasks, "bulk", fake_bulk)
+    monkeypatch.setattr(tasks.time, "sleep", lambda seconds: None)
+
+    stats = tasks.index_article_range(chunk_size=2)
+
+    assert fake_bulk.requests == [
+        article_ids[:2],
+        article_ids[:1],
+        article_ids[:1],
+        article_ids[2:],
+    ]
+    assert stats["indexed"] == 2
+    assert stats["retries"] == 2
+    assert stats["errors"] == [{"id": str(article_ids[1]), "status": 400}]
+
+
+def test_index_article_range_gives_up_after_max_retries(
+    monkeypatch, opensearch, article_ids
+):
+    fake_bulk = FakeBulk({article_ids[0]: [429, 429]})
+    monkeypatch.setattr(tasks, "bulk", fake_bulk)
+    monkeypatch.setattr(tasks.time, "sleep", lambda seconds: None)
+
+    stats = tasks.index_article_range(article_ids[0], article_ids[1], max_retries=1)
+
+    assert fake_bulk.requests == [article_ids[:1], article_ids[:1]]
+    assert stats["errors"] == [{"id": str(article_ids[0]), "status": 429}]
+
+
+def test_index_articles_parallel(monkeypatch, article_ids):
+    monkeypatch.setattr(tasks.celery_app.conf, "task_always_eager", True)
+    fake_bulk = FakeBulk({})
+    monkeypatch.setattr(tasks, "bulk", fake_bulk)
+
+    assert tasks.article_id_ranges(2) == [
+        (article_ids[0], article_ids[0] + 2),
+        (article_ids[0] + 2, article_ids[2] + 1),
+    ]
+    stats = tasks.index_articles_parallel(2, index_name="articles-1")
+
+    assert fake_bulk.requests == [article_ids[:2], article_ids[2:]]
+    assert stats["indexed"] == 3
+    assert stats["errors"] == []
+
+
+def test_backfill_article_file_metadata(article_ids):
+    uploaded = ArticleFile.objects.create(
+        article_id_id=article_ids[0],
+        file=SimpleUploadedFile("paper.pdf", b"%PDF-1.4", "application/pdf"),
+    )
+    missing = ArticleFile.objects.create(
+        article_id_id=article_ids[1], file="files/missing.xml"
+    )
+    expected = {
+        "size": 8,
+        "checksum": f"md5:{hashlib.md5(b'%PDF-1.4').hexdigest()}",
+        "content_type": "application/pdf",
+    }
+    assert ArticleFile.objects.filter(pk=uploaded.pk).values(*expected).get() == (
+        expected
+    )
+    ArticleFile.objects.update(size=None, checksum="", content_type="")
+
+    stats = tasks.backfill_article_file_metadata(workers=2, batch_size=1)
+
+    assert stats == {"updated": 1, "missing": [missing.pk]}
+    assert ArticleFile.objects.filter(pk=uploaded.pk).values(*expected).get() == (
+        expected
+    )
+    assert ArticleFile.objects.get(pk=missing.pk).size is None
+
+
+def test_migrate_article_files(article_ids, legacy_storage):
+    contents = {"paper.pdf": b"%PDF-1.4", "broken.pdf": b"%PDF-1.5"}
+    for name, content in contents.items():
+        legacy_storage.save(f"files/{article_ids[0]}/{name}", ContentFile(content))
+    copied, missing, broken = [
+        ArticleFile.objects.create(
+            article_id_id=article_ids[0],
+            file=f"files/{article_ids[0]}/{name}",
+            checksum="md5:0" if name == "broken.pdf" else "",
+        )
+        for name in ["paper.pdf", "data.xml", "broken.pdf"]
+    ]
+
+    stats = tasks.migrate_article_files("legacy-records", workers=2, batch_size=2)
+    resumed = tasks.migrate_article_files("legacy-records", workers=2, batch_size=2)
+
+    assert stats == {
+        "copied": 1,
+        "skipped": 0,
+        "missing": [missing.pk],
+        "failed": [broken.pk],
+    }
+    assert resumed == {**stats, "copied": 0, "skipped": 1}
+    copied.refresh_from_db()
+    assert copied.file.read() == b"%PDF-1.4"
+    assert copied.size == 8
+    assert copied.checksum == f"md5:{hashlib.md5(b'%PDF-1.4').hexdigest()}"
+    assert copied.content_type == "application/pdf"
+    assert not storages["default"].exists(broken.file.name)
+
+
+class FakeS3Storage(S3Storage):
+    copies = []
+
+    @property
+    def bucket(self):
+        return SimpleNamespace(
+            copy=lambda source, key, Config: self.copies.append((source, key))
+        )
+
+
+def test_copy_file_between_buckets_server_side():
+    source = FakeS3Storage(bucket_name="legacy", location="legacy_files")
+    target = FakeS3Storage(bucket_name="scoap3", location="media")
+
+    assert tasks._copy_file(source, target, "files/1/paper.pdf") is None
+    assert FakeS3Storage.copies == [
+        (
+            {"Bucket": "legacy", "Key": "legacy_files/files/1/paper.pdf"},
+            "media/files/1/paper.pdf",
+        )
+    ]
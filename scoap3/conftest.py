@@ -1,7 +1,15 @@
 import pytest
+from django.core.files.storage import storages
 from django.core.management import call_command
 
-from scoap3.misc.models import License
+from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.misc.models import (
+    ArticleArxivCategory,
+    License,
+    PublicationInfo,
+    Publisher,
+    RelatedMaterial,
+)
 from scoap3.misc.tests.factories import LicenseFactory
 from scoap3.users.models import User
 from scoap3.users.tests.factories import UserFactory
@@ -19,6 +27,48 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture
+def legacy_storage(settings, tmpdir):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "legacy-records": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": tmpdir.mkdir("legacy_records").strpath},
+        },
+    }
+    return storages["legacy-records"]
+
+
+@pytest.fixture
+def articles(request, db):
+    count = getattr(request, "param", 5)
+    license = License.objects.create(url="https://creativecommons.org", name="CC-BY")
+    material = RelatedMaterial.objects.create(
+        title="Data", doi="10.5281/zenodo.1", related_material_type="dataset"
+    )
+    publisher = Publisher.objects.create(name="Springer")
+    articles = []
+    for i in range(count):
+        article = Article.objects.create(title=f"Title {i}")
+        article.related_licenses.add(license)
+        article.related_materials.add(material)
+        ArticleFile.objects.create(article_id=article, file=f"files/{i}/{i}.pdf")
+        ArticleIdentifier.objects.create(
+            article_id=article, identifier_type="DOI", identifier_value=f"10.1/{i}"
+        )
+        ArticleArxivCategory.objects.create(
+            article_id=article, category="hep-th", primary=True
+        )
+        PublicationInfo.objects.create(
+            article_id=article,
+            journal_title="JHEP",
+            volume_year="2023",
+            publisher=publisher,
+        )
+        articles.append(article)
+    return articles
+
+
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
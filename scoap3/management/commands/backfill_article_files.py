@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from scoap3.articles.tasks import backfill_article_file_metadata
+
+
+class Command(BaseCommand):
+    help = "Store the size, checksum and content type of the article files"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            required=False,
+            help="Number of files read from the storage at the same time.",
+        )
+
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            required=False,
+            help="Files saved per database update.",
+        )
+
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Read the files that already have their metadata again.",
+        )
+
+    def handle(self, *args, **options):
+        stats = backfill_article_file_metadata(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            force=options["force"],
+        )
+        self.stdout.write(f"Updated {stats['updated']} files")
+        for pk in stats["missing"]:
+            self.stdout.write(self.style.ERROR(f"Missing: article file {pk}"))
@@ -5,7 +5,7 @@ import urllib3
 from django.core.management.base import BaseCommand, CommandParser
 from elasticsearch import Elasticsearch
 
-from scoap3.tasks import upload_index_range
+from scoap3.tasks import export_legacy_slice, legacy_record_slices, upload_index_range
 
 env = environ.Env()
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -52,6 +52,23 @@ class Command(BaseCommand):
             required=False,
             help="Password for Elasticsearch. Uses OPENSEARCH_PASSWORD if empty.",
         )
+        parser.add_argument(
+            "--archive",
+            action="store_true",
+            help="Write each batch as one gzipped newline-delimited JSON file.",
+        )
+        parser.add_argument(
+            "--slices",
+            type=int,
+            required=False,
+            help="Export in this many control number ranges, one task each.",
+        )
+        parser.add_argument(
+            "--folder",
+            type=str,
+            required=False,
+            help="Folder to export to. Reuse a folder to resume a sliced export.",
+        )
 
     def handle(self, *args, **options):
         if not options["username"]:
@@ -59,7 +76,7 @@ class Command(BaseCommand):
         if not options["password"]:
             options["password"] = env("OPENSEARCH_PASSWORD")
 
-        timestamp = round(time.time() * 1000)
+        folder_name = options["folder"] or round(time.time() * 1000)
         es_settings = [
             dict(
                 host=options["host"],
@@ -75,6 +92,25 @@ class Command(BaseCommand):
 
         es = Elasticsearch(es_settings)
         es.indices.refresh(options["index"])
+
+        if options["slices"]:
+            slices = legacy_record_slices(es, options["index"], options["slices"])
+            for lower, upper in slices:
+                self.stdout.write(
+                    f"Sending task for control numbers {lower} to {upper - 1}"
+                )
+                export_legacy_slice.delay(
+                    es_settings,
+                    options["index"],
+                    folder_name,
+                    lower,
+                    upper,
+                    options["batch_size"],
+                    archive=options["archive"],
+                )
+            self.stdout.write(f"Export folder: {folder_name}")
+            return
+
         scroll = "30s"
         response = es.search(
             index=options["index"],
@@ -90,7 +126,13 @@ class Command(BaseCommand):
         while processed < total_docs:
             documents = response["hits"]["hits"]
             doc_ids = [doc["_id"] for doc in documents]
-            upload_index_range.delay(es_settings, options["index"], doc_ids, timestamp)
+            upload_index_range.delay(
+                es_settings,
+                options["index"],
+                doc_ids,
+                folder_name,
+                archive=options["archive"],
+            )
             processed += len(doc_ids)
             response = es.scroll(scroll_id=scroll_id, scroll=scroll)
         es.clear_scroll(scroll_id=scroll_id)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Count, Max, Min, Sum
+
+from scoap3.misc.models import LegacyRecordFile, LegacyRecordFileStatus
+
+
+class Command(BaseCommand):
+    help = "Report the progress of a legacy records migration"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--path",
+            type=str,
+            required=True,
+            help="Directory of the legacy_records version",
+        )
+
+        parser.add_argument(
+            "--task",
+            type=str,
+            default="migrate_legacy_records",
+            choices=["migrate_legacy_records", "link_affiliations"],
+            help="Migration task to report on.",
+        )
+
+        parser.add_argument(
+            "--show-failed",
+            type=int,
+            default=20,
+            help="Number of failed files to list.",
+        )
+
+    def handle(self, *args, **options):
+        entries = LegacyRecordFile.objects.filter(
+            task=options["task"], folder_name=options["path"]
+        )
+        files = dict(
+            entries.values("status")
+            .annotate(count=Count("id"))
+            .values_list("status", "count")
+        )
+        pending = files.get(LegacyRecordFileStatus.PENDING, 0)
+        finished = entries.exclude(status=LegacyRecordFileStatus.PENDING).aggregate(
+            files=Count("id"),
+            records=Sum("records"),
+            started_at=Min("started_at"),
+            finished_at=Max("finished_at"),
+        )
+
+        self.stdout.write(
+            f"Files: {files.get(LegacyRecordFileStatus.DONE, 0)} done, "
+            f"{files.get(LegacyRecordFileStatus.FAILED, 0)} failed, "
+            f"{pending} pending"
+        )
+        if not finished["files"]:
+            return
+
+        elapsed = (finished["finished_at"] - finished["started_at"]).total_seconds()
+        records = finished["records"] or 0
+        self.stdout.write(f"Records: {records} in {timedelta(seconds=round(elapsed))}")
+        if elapsed > 0:
+            files_per_second = finished["files"] / elapsed
+            self.stdout.write(
+                f"Throughput: {records / elapsed:.1f} records/s, "
+                f"{files_per_second:.2f} files/s"
+            )
+            eta = timedelta(seconds=round(pending / files_per_second))
+            self.stdout.write(f"ETA: {eta}")
+
+        failed = entries.filter(status=LegacyRecordFileStatus.FAILED).order_by(
+            "filename"
+        )
+        for entry in failed[: options["show_failed"]]:
+            records = ", ".join(str(record) for record in entry.failed_records)
+            self.stdout.write(
+                self.style.ERROR(f"Failed: {entry.filename} {records}".rstrip())
+            )
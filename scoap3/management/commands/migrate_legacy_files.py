@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from scoap3.articles.tasks import migrate_article_files
+
+
+class Command(BaseCommand):
+    help = "Copy the article files from the legacy storage to the default one"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--source",
+            type=str,
+            default="legacy-files",
+            required=False,
+            help="Storage the files are copied from.",
+        )
+
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            required=False,
+            help="Number of files copied at the same time.",
+        )
+
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            required=False,
+            help="Files saved per database update.",
+        )
+
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Copy the files that were already copied again.",
+        )
+
+    def handle(self, *args, **options):
+        stats = migrate_article_files(
+            source=options["source"],
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            force=options["force"],
+        )
+        self.stdout.write(
+            f"Copied {stats['copied']} files, skipped {stats['skipped']} copied "
+            "before"
+        )
+        for pk in stats["missing"]:
+            self.stdout.write(self.style.ERROR(f"Missing: article file {pk}"))
+        for pk in stats["failed"]:
+            self.stdout.write(self.style.ERROR(f"Failed: article file {pk}"))
@@ -1,9 +1,12 @@
-import math
-
-from django.core.files.storage import storages
 from django.core.management.base import BaseCommand, CommandParser
 
-from scoap3.tasks import migrate_legacy_records
+from scoap3.tasks import (
+    chunk_legacy_records,
+    list_legacy_records,
+    migrate_legacy_records,
+    pending_legacy_records,
+    register_legacy_records,
+)
 
 
 class Command(BaseCommand):
@@ -33,17 +36,47 @@ class Command(BaseCommand):
             help="Should the ArticleFiles entries get created?",
         )
 
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Write each batch with bulk queries instead of record by record.",
+        )
+
+        parser.add_argument(
+            "--atomic",
+            action="store_true",
+            help="Import each batch in one transaction with a savepoint per record.",
+        )
+
+        parser.add_argument(
+            "--refresh-manifest",
+            action="store_true",
+            help="List the directory again instead of reading its saved manifest.",
+        )
+
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Only send files that are not marked as done in the ledger.",
+        )
+
     def handle(self, *args, **options):
-        storage = storages["legacy-records"]
-        amount_total = len(storage.listdir(options["path"])[1])
-        self.stdout.write(f"Found {amount_total} files")
-        for idx in range(math.ceil(amount_total / options["batch_size"])):
-            lower_index = int(idx) * options["batch_size"]
-            upper_index = min(
-                int(idx) * options["batch_size"] + options["batch_size"], amount_total
+        filenames = list_legacy_records(
+            options["path"], refresh=options["refresh_manifest"]
+        )
+        self.stdout.write(f"Found {len(filenames)} files")
+        if options["resume"]:
+            filenames = pending_legacy_records(
+                "migrate_legacy_records", options["path"], filenames
             )
-            index_range = [lower_index, upper_index]
-            self.stdout.write(f"Sending task with index range {index_range}")
+            self.stdout.write(f"Resuming with {len(filenames)} files")
+        register_legacy_records("migrate_legacy_records", options["path"], filenames)
+        for chunk in chunk_legacy_records(filenames, options["batch_size"]):
+            self.stdout.write(f"Sending task with files {chunk[0]} to {chunk[-1]}")
             migrate_legacy_records.delay(
-                options["path"], index_range, options["migrate_files"]
+                options["path"],
+                chunk,
+                options["migrate_files"],
+                bulk=options["bulk"],
+                atomic=options["atomic"],
             )
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from scoap3.articles.tasks import (
+    create_articles_index,
+    index_article_range,
+    index_articles_parallel,
+    swap_articles_index,
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the articles index and swap it in without downtime"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=1,
+            required=False,
+            help="Number of previous index generations to keep.",
+        )
+
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            required=False,
+            help="Split the articles into this many id ranges, one task each.",
+        )
+
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            required=False,
+            help="Documents per bulk request.",
+        )
+
+    def handle(self, *args, **options):
+        started_at = datetime.now(tz=timezone.utc)
+        name = create_articles_index(started_at)
+        self.stdout.write(f"Indexing articles into {name}")
+
+        if options["workers"] > 1:
+            stats = index_articles_parallel(
+                options["workers"], index_name=name, chunk_size=options["chunk_size"]
+            )
+        else:
+            stats = index_article_range(
+                index_name=name, chunk_size=options["chunk_size"]
+            )
+        rate = stats["indexed"] / stats["seconds"] if stats["seconds"] else 0
+        self.stdout.write(
+            f"Indexed {stats['indexed']} articles in {stats['seconds']:.0f}s "
+            f"({rate:.0f} docs/s), {stats['retries']} retries"
+        )
+        for error in stats["errors"]:
+            self.stdout.write(
+                self.style.ERROR(f"Failed: article {error['id']} ({error['status']})")
+            )
+
+        swap_articles_index(name, started_at, keep=options["keep"])
+        self.stdout.write(f"Articles are served from {name}")
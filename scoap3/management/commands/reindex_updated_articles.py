@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils.dateparse import parse_datetime
+
+from scoap3.articles.tasks import reindex_updated_articles
+
+
+class Command(BaseCommand):
+    help = "Index the articles updated since the last incremental reindex"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--since",
+            type=str,
+            required=False,
+            help="ISO datetime to index from instead of the last reindex.",
+        )
+
+        parser.add_argument(
+            "--overlap",
+            type=int,
+            default=300,
+            required=False,
+            help="Seconds to go back from the last reindex.",
+        )
+
+    def handle(self, *args, **options):
+        since = options["since"]
+        if since and parse_datetime(since) is None:
+            raise CommandError(f"Invalid datetime: {since}")
+
+        indexed = reindex_updated_articles(since=since, overlap=options["overlap"])
+        self.stdout.write(f"Indexed {indexed} articles")
@@ -8,6 +8,7 @@ from scoap3.misc.models import (
     ExperimentalCollaboration,
     Funder,
     InstitutionIdentifier,
+    LegacyRecordFile,
     License,
     PublicationInfo,
     Publisher,
@@ -52,6 +53,12 @@ class InstitutionIdentifierAdmin(admin.ModelAdmin):
     pass
 
 
+class LegacyRecordFileAdmin(admin.ModelAdmin):
+    list_display = ["task", "folder_name", "filename", "status", "finished_at"]
+    list_filter = ["task", "status"]
+    search_fields = ["folder_name", "filename"]
+
+
 class LicenseAdmin(admin.ModelAdmin):
     list_display = ["id", "name", "url"]
     search_fields = ["name"]
@@ -79,6 +86,7 @@ admin.site.register(Country, CountryAdmin)
 admin.site.register(ExperimentalCollaboration, ExperimentalCollaborationAdmin)
 admin.site.register(Funder, FunderAdmin)
 admin.site.register(InstitutionIdentifier, InstitutionIdentifierAdmin)
+admin.site.register(LegacyRecordFile, LegacyRecordFileAdmin)
 admin.site.register(License, LicenseAdmin)
 admin.site.register(PublicationInfo, PublicationInfoAdmin)
 admin.site.register(Publisher, PublisherAdmin)
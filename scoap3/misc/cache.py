@@ -0,0 +1,70 @@
+from collections import OrderedDict
+
+from django.db import transaction
+
+from scoap3.misc.models import Country, ExperimentalCollaboration, License, Publisher
+
+
+class ReferenceCache:
+    """Per-process cache resolving reference rows to their primary keys.
+
+    ``fields`` must be unique together in ``model``. Holds at most
+    ``max_size`` entries, evicting the least recently used one.
+    Newly created rows are only cached once their transaction commits, so a
+    rolled back insert never leaves a dangling primary key behind.
+    """
+
+    def __init__(self, model, fields, max_size=1024):
+        self.model = model
+        self.fields = fields
+        self.max_size = max_size
+        self._pks = OrderedDict()
+
+    def __len__(self):
+        return len(self._pks)
+
+    def warm(self):
+        self._pks.clear()
+        rows = self.model.objects.values_list("pk", *self.fields)[: self.max_size]
+        for pk, *values in rows:
+            self._pks.setdefault(tuple(values), pk)
+
+    def clear(self):
+        self._pks.clear()
+
+    def get_or_create(self, **values):
+        key = tuple(values[field] for field in self.fields)
+        if key in self._pks:
+            self._pks.move_to_end(key)
+            return self._pks[key]
+
+        # ``get_or_create`` retries the lookup when a concurrent insert of the
+        # same row violates the unique constraint on ``fields``.
+        pk = self.model.objects.get_or_create(**values)[0].pk
+        transaction.on_commit(lambda: self._remember(key, pk))
+        return pk
+
+    def _remember(self, key, pk):
+        self._pks[key] = pk
+        self._pks.move_to_end(key)
+        while len(self._pks) > self.max_size:
+            self._pks.popitem(last=False)
+
+
+licenses = ReferenceCache(License, ["url", "name"])
+publishers = ReferenceCache(Publisher, ["name"])
+countries = ReferenceCache(Country, ["code", "name"])
+experimental_collaborations = ReferenceCache(ExperimentalCollaboration, ["name"])
+
+
+CACHES = [licenses, publishers, countries, experimental_collaborations]
+
+
+def warm():
+    for cache in CACHES:
+        cache.warm()
+
+
+def clear():
+    for cache in CACHES:
+        cache.clear()
@@ -0,0 +1,84 @@
+from functools import lru_cache
+
+import pycountry
+from sentry_sdk import capture_exception
+
+COUNTRY_OVERRIDES = {
+    "cern": ("CERN", "CERN"),
+    "jinr": ("JINR", "JINR"),
+    "niger": ("NE", "Niger"),
+    "turkiye": ("TR", "Türkiye"),
+    "turkey": ("TR", "Türkiye"),
+}
+
+LOOKUP_ATTRIBUTES = [
+    "alpha_2",
+    "alpha_3",
+    "numeric",
+    "name",
+    "official_name",
+    "common_name",
+]
+
+
+class CountryResolver:
+    """Resolve free-text affiliation countries to a ``Country`` code and name.
+
+    Exact matches on ISO codes and names are answered from an index built once,
+    ``pycountry.countries.search_fuzzy`` is only used for the remaining values
+    and its results are kept in an LRU cache.
+    """
+
+    def __init__(self, fuzzy_cache_size=4096):
+        self.index = self._build_index()
+        self.hits = 0
+        self.misses = 0
+        self._search_fuzzy = lru_cache(maxsize=fuzzy_cache_size)(self._search_fuzzy)
+
+    @staticmethod
+    def _build_index():
+        index = {}
+        for attribute in LOOKUP_ATTRIBUTES:
+            for country in pycountry.countries:
+                value = getattr(country, attribute, None)
+                if value is None:
+                    continue
+                for key in {value.lower(), pycountry.remove_accents(value.lower())}:
+                    index.setdefault(key, (country.alpha_2, country.name))
+        index.update(COUNTRY_OVERRIDES)
+        return index
+
+    def _search_fuzzy(self, country):
+        try:
+            result = pycountry.countries.search_fuzzy(country)[0]
+        except LookupError as e:
+            capture_exception(e)
+            return None
+        return result.alpha_2, result.name
+
+    def resolve(self, country):
+        if not country or country == "HUMAN CHECK":
+            return None
+        country = country.strip().lower()
+        if country in self.index:
+            self.hits += 1
+            match = self.index[country]
+        else:
+            self.misses += 1
+            match = self._search_fuzzy(country)
+        if match is None:
+            return None
+        code, name = match
+        return {"code": code, "name": name}
+
+    def stats(self):
+        fuzzy = self._search_fuzzy.cache_info()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fuzzy_hits": fuzzy.hits,
+            "fuzzy_misses": fuzzy.misses,
+        }
+
+
+country_resolver = CountryResolver()
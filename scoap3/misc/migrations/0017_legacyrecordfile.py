@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("misc", "0016_alter_articlearxivcategory_article_id_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LegacyRecordFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=255)),
+                ("folder_name", models.CharField(max_length=255)),
+                ("filename", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+                ("records", models.PositiveIntegerField(default=0)),
+                ("failed_records", models.JSONField(blank=True, default=list)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["task", "folder_name", "status"],
+                        name="misc_legacy_task_3432b4_idx",
+                    )
+                ],
+                "unique_together": {("task", "folder_name", "filename")},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("misc", "0017_legacyrecordfile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="legacyrecordfile",
+            name="modified_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="legacyrecordfile",
+            name="size",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:48
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_collaborations(apps, schema_editor):
+    ExperimentalCollaboration = apps.get_model("misc", "ExperimentalCollaboration")
+    Through = ExperimentalCollaboration.article_id.through
+    duplicates = (
+        ExperimentalCollaboration.objects.values("name")
+        .annotate(count=Count("id"), first=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        others = ExperimentalCollaboration.objects.filter(
+            name=duplicate["name"]
+        ).exclude(pk=duplicate["first"])
+        article_ids = Through.objects.filter(
+            experimentalcollaboration__in=others
+        ).values_list("article_id", flat=True)
+        Through.objects.bulk_create(
+            [
+                Through(
+                    experimentalcollaboration_id=duplicate["first"],
+                    article_id=article_id,
+                )
+                for article_id in set(article_ids)
+            ],
+            ignore_conflicts=True,
+        )
+        others.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("misc", "0018_legacyrecordfile_size_modified_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_collaborations, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name="experimentalcollaboration",
+            name="name",
+            field=models.TextField(blank=True, default="", unique=True),
+        ),
+    ]
@@ -151,7 +151,7 @@ class ArticleArxivCategory(models.Model):
 
 class ExperimentalCollaboration(models.Model):
     article_id = models.ManyToManyField("articles.Article", blank=True)
-    name = models.TextField(blank=True, default="")
+    name = models.TextField(blank=True, default="", unique=True)
 
     class Meta:
         ordering = ["id"]
@@ -182,3 +182,32 @@ class RelatedMaterial(models.Model):
 
     class Meta:
         ordering = ["id"]
+
+
+class LegacyRecordFileStatus(models.TextChoices):
+    PENDING = ("pending",)
+    DONE = ("done",)
+    FAILED = ("failed",)
+
+
+class LegacyRecordFile(models.Model):
+    task = models.CharField(max_length=255)
+    folder_name = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=255,
+        choices=LegacyRecordFileStatus.choices,
+        default=LegacyRecordFileStatus.PENDING,
+    )
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+    size = models.PositiveBigIntegerField(blank=True, null=True)
+    modified_at = models.DateTimeField(blank=True, null=True)
+    records = models.PositiveIntegerField(default=0)
+    failed_records = models.JSONField(blank=True, default=list)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["id"]
+        unique_together = (("task", "folder_name", "filename"),)
+        indexes = [models.Index(fields=["task", "folder_name", "status"])]
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+from django.db import connection, transaction
+
+from scoap3.misc.cache import ReferenceCache
+from scoap3.misc.models import ExperimentalCollaboration, Publisher
+
+
+@pytest.mark.django_db
+def test_warm_cache_resolves_without_queries(django_assert_num_queries):
+    publisher = Publisher.objects.create(name="Springer")
+    cache = ReferenceCache(Publisher, ["name"])
+    cache.warm()
+
+    with django_assert_num_queries(0):
+        assert cache.get_or_create(name="Springer") == publisher.pk
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cache_is_bounded():
+    cache = ReferenceCache(Publisher, ["name"], max_size=2)
+    for name in ["APS", "Elsevier", "Springer"]:
+        cache.get_or_create(name=name)
+
+    assert len(cache) == 2
+    assert Publisher.objects.count() == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rolled_back_rows_are_not_cached():
+    cache = ReferenceCache(Publisher, ["name"])
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            cache.get_or_create(name="Springer")
+            raise RuntimeError
+
+    assert len(cache) == 0
+    pk = cache.get_or_create(name="Springer")
+    assert Publisher.objects.get(name="Springer").pk == pk
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_workers_create_a_single_row():
+    barrier = threading.Barrier(4)
+    pks = []
+
+    def worker():
+        cache = ReferenceCache(ExperimentalCollaboration, ["name"])
+        barrier.wait()
+        try:
+            pks.append(cache.get_or_create(name="ATLAS"))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert ExperimentalCollaboration.objects.filter(name="ATLAS").count() == 1
+    assert len(set(pks)) == 1
@@ -0,0 +1,118 @@
+import random
+import time
+
+import pycountry
+import pytest
+
+from scoap3.misc.countries import COUNTRY_OVERRIDES, CountryResolver
+
+AFFILIATION_COUNTRIES = {
+    "USA": 30,
+    "Germany": 14,
+    "CERN": 12,
+    "Italy": 10,
+    "UK": 8,
+    "France": 8,
+    "Japan": 7,
+    "China": 7,
+    "Russia": 5,
+    "Switzerland": 5,
+    "Spain": 4,
+    "India": 4,
+    "Korea": 3,
+    "Poland": 3,
+    "Brazil": 2,
+    "JINR": 2,
+    "Turkey": 2,
+    "Iran": 1,
+    "Czech Republic": 1,
+    "Niger": 1,
+}
+
+
+def _search_fuzzy_twice(country):
+    country = country.lower()
+    if country in COUNTRY_OVERRIDES:
+        return COUNTRY_OVERRIDES[country]
+    return (
+        pycountry.countries.search_fuzzy(country)[0].alpha_2,
+        pycountry.countries.search_fuzzy(country)[0].name,
+    )
+
+
+@pytest.fixture
+def affiliation_countries():
+    rng = random.Random(0)
+    return rng.choices(
+        list(AFFILIATION_COUNTRIES.keys()),
+        weights=list(AFFILIATION_COUNTRIES.values()),
+        k=5000,
+    )
+
+
+@pytest.mark.parametrize(
+    "country, expected",
+    [
+        ("CERN", {"code": "CERN", "name": "CERN"}),
+        ("jinr", {"code": "JINR", "name": "JINR"}),
+        ("Niger", {"code": "NE", "name": "Niger"}),
+        ("Turkey", {"code": "TR", "name": "Türkiye"}),
+        ("DE", {"code": "DE", "name": "Germany"}),
+        ("USA", {"code": "US", "name": "United States"}),
+        ("Germany", {"code": "DE", "name": "Germany"}),
+        ("Russia", {"code": "RU", "name": "Russian Federation"}),
+        ("HUMAN CHECK", None),
+        ("", None),
+        ("Not a country", None),
+    ],
+)
+def test_resolve(country, expected):
+    assert CountryResolver().resolve(country) == expected
+
+
+def test_resolve_matches_fuzzy_search(affiliation_countries):
+    resolver = CountryResolver()
+    for country in set(affiliation_countries):
+        code, name = _search_fuzzy_twice(country)
+        assert resolver.resolve(country) == {"code": code, "name": name}
+
+
+def test_resolve_counts_hits_and_misses():
+    resolver = CountryResolver()
+    for country in ["Germany", "Germany", "UK", "UK"]:
+        resolver.resolve(country)
+
+    assert resolver.stats() == {
+        "hits": 2,
+        "misses": 2,
+        "fuzzy_hits": 1,
+        "fuzzy_misses": 1,
+    }
+
+
+def test_resolve_searches_each_country_once(affiliation_countries):
+    resolver = CountryResolver()
+    for country in affiliation_countries:
+        resolver.resolve(country)
+
+    stats = resolver.stats()
+    assert stats["hits"] + stats["misses"] == len(affiliation_countries)
+    assert stats["fuzzy_hits"] + stats["fuzzy_misses"] == stats["misses"]
+    assert stats["fuzzy_misses"] <= len(AFFILIATION_COUNTRIES)
+
+
+@pytest.mark.benchmark
+def test_resolve_benchmark(affiliation_countries):
+    sample = affiliation_countries[:50]
+    start = time.perf_counter()
+    for country in sample:
+        _search_fuzzy_twice(country)
+    fuzzy_per_call = (time.perf_counter() - start) / len(sample)
+
+    resolver = CountryResolver()
+    start = time.perf_counter()
+    for country in affiliation_countries:
+        resolver.resolve(country)
+    resolver_per_call = (time.perf_counter() - start) / len(affiliation_countries)
+
+    assert resolver_per_call * 100 < fuzzy_per_call
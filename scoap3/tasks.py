@@ -1,33 +1,44 @@
+import gzip
+import hashlib
 import io
 import json
 import logging
+import mimetypes
 import os
 import re
+from functools import partial
+from itertools import islice
 
 import backoff
-import pycountry
 from django.core.exceptions import MultipleObjectsReturned, ValidationError
 from django.core.files.storage import storages
 from django.core.validators import URLValidator
+from django.db import transaction
+from django.utils import timezone
+from django_opensearch_dsl.apps import DODConfig
 from elasticsearch import ConnectionError, ConnectionTimeout, Elasticsearch
 from sentry_sdk import capture_exception
 
 from config import celery_app
 from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.articles.tasks import index_articles
 from scoap3.authors.models import Author, AuthorIdentifier
+from scoap3.misc import cache
+from scoap3.misc.countries import country_resolver
 from scoap3.misc.models import (
     Affiliation,
     ArticleArxivCategory,
     Copyright,
-    Country,
-    ExperimentalCollaboration,
-    License,
+    LegacyRecordFile,
+    LegacyRecordFileStatus,
     PublicationInfo,
-    Publisher,
 )
 
 logger = logging.getLogger(__name__)
 
+ARCHIVE_SUFFIX = ".ndjson.gz"
+LEGACY_RECORDS_BATCH_SIZE = 500
+
 
 def _rename_keys(data, replacements):
     for item in data:
@@ -37,10 +48,10 @@ def _rename_keys(data, replacements):
     return data
 
 
-def _create_licenses(data):
+def _parse_licenses(data):
     licenses = []
     val = URLValidator()
-    for license in _rename_keys(data, [("license", "name")]):
+    for license in _rename_keys([dict(item) for item in data], [("license", "name")]):
         try:
             val(license.get("url"))
         except ValidationError:
@@ -63,21 +74,31 @@ def _create_licenses(data):
             license["name"] = "CC-BY-3.0"
             license["url"] = "http://creativecommons.org/licenses/by/3.0/"
 
-        license, _ = License.objects.get_or_create(
-            url=license.get("url", ""), name=license.get("name", "")
+        licenses.append(
+            {"url": license.get("url", ""), "name": license.get("name", "")}
         )
-        licenses.append(license)
     return licenses
 
 
-def _create_article(data, licenses):
-    article_data = {
+def _create_licenses(data):
+    licenses = []
+    for license_data in _parse_licenses(data):
+        licenses.append(cache.licenses.get_or_create(**license_data))
+    return licenses
+
+
+def _parse_article(data):
+    return {
         "id": data.get("control_number"),
         "publication_date": data["imprints"][0].get("date"),
         "title": data["titles"][0].get("title"),
         "subtitle": data["titles"][0].get("subtitle", ""),
         "abstract": data["abstracts"][0].get("value", ""),
     }
+
+
+def _create_article(data, licenses):
+    article_data = _parse_article(data)
     if Article.objects.filter(pk=article_data["id"]).exists():
         article = Article.objects.get(pk=article_data["id"])
         article.__dict__.update(**article_data)
@@ -86,18 +107,31 @@ def _create_article(data, licenses):
         article._created_at = data.get("_created")
 
     article.related_licenses.set(licenses)
-    article.save()
+    article.save(keep_source_hashes=True)
     return article
 
 
+def _legacy_file_metadata(file):
+    content_type, _ = mimetypes.guess_type(file.get("key", ""))
+    metadata = {
+        "size": file.get("size"),
+        "checksum": file.get("checksum"),
+        "content_type": content_type,
+    }
+    # Keep what is already stored for the values the record does not have.
+    return {
+        field: value for field, value in metadata.items() if value not in ("", None)
+    }
+
+
 def _create_article_file(data, article):
     for file in data.get("_files", []):
-        article_id = article.id
         filename = file.get("key")
-        file_path = f"files/{article_id}/{filename}"
-        article = Article.objects.get(pk=article_id)
+        file_path = f"files/{article.id}/{filename}"
         article_file_data = {"article_id": article, "file": file_path}
-        ArticleFile.objects.get_or_create(**article_file_data)
+        ArticleFile.objects.update_or_create(
+            **article_file_data, defaults=_legacy_file_metadata(file)
+        )
 
 
 def _create_article_identifier(data, article):
@@ -149,8 +183,7 @@ def _create_publisher(data):
         publisher_data = {
             "name": imprint.get("publisher"),
         }
-        publisher, _ = Publisher.objects.get_or_create(**publisher_data)
-        publishers.append(publisher)
+        publishers.append(cache.publishers.get_or_create(**publisher_data))
     return publishers
 
 
@@ -166,7 +199,7 @@ def _create_publication_info(data, article, publishers):
             "artid": publication_info.get("artid", ""),
             "volume_year": publication_info.get("year"),
             "journal_issue_date": publication_info.get("journal_issue_date"),
-            "publisher_id": publishers[idx].id,
+            "publisher_id": publishers[idx],
         }
         PublicationInfo.objects.get_or_create(**publication_info_data)
 
@@ -177,31 +210,31 @@ def _create_experimental_collaborations(data):
             experimental_collaboration_data = {
                 "name": experimental_collaboration.get("value")
             }
-            (
-                experimental_collaboration,
-                _,
-            ) = ExperimentalCollaboration.objects.get_or_create(
+            cache.experimental_collaborations.get_or_create(
                 **experimental_collaboration_data
             )
 
 
+def _parse_author(author, idx):
+    name_match = re.match(r"(.*),(.*)", author.get("full_name", ""))
+    if name_match and len(name_match.groups()) == 2:
+        first_name = name_match.group(2)
+        last_name = name_match.group(1)
+    else:
+        first_name = author.get("given_names", "")
+        last_name = author.get("surname", "")
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": author.get("email", ""),
+        "author_order": idx,
+    }
+
+
 def _create_author(data, article):
     authors = []
     for idx, author in enumerate(data.get("authors", [])):
-        name_match = re.match(r"(.*),(.*)", author.get("full_name", ""))
-        if name_match and len(name_match.groups()) == 2:
-            first_name = name_match.group(2)
-            last_name = name_match.group(1)
-        else:
-            first_name = author.get("given_names", "")
-            last_name = author.get("surname", "")
-        author_data = {
-            "article_id": article,
-            "first_name": first_name,
-            "last_name": last_name,
-            "email": author.get("email", ""),
-            "author_order": idx,
-        }
+        author_data = {"article_id": article, **_parse_author(author, idx)}
         author_obj, _ = Author.objects.get_or_create(**author_data)
         authors.append(author_obj)
     return authors
@@ -219,41 +252,10 @@ def _create_author_identifier(data, authors):
 
 
 def _create_country(affiliation):
-    country = affiliation.get("country", "")
-    try:
-        if not country or country == "HUMAN CHECK":
-            return None
-        country = country.lower()
-        if country == "cern":
-            country_data = {
-                "code": "CERN",
-                "name": "CERN",
-            }
-        elif country == "jinr":
-            country_data = {
-                "code": "JINR",
-                "name": "JINR",
-            }
-        elif country == "niger":
-            country_data = {
-                "code": "NE",
-                "name": "Niger",
-            }
-        elif country == "turkiye" or country == "turkey":
-            country_data = {
-                "code": "TR",
-                "name": "Türkiye",
-            }
-        else:
-            country_data = {
-                "code": pycountry.countries.search_fuzzy(country)[0].alpha_2,
-                "name": pycountry.countries.search_fuzzy(country)[0].name,
-            }
-        country_obj, _ = Country.objects.get_or_create(**country_data)
-        return country_obj
-    except LookupError as e:
-        capture_exception(e)
+    country_data = country_resolver.resolve(affiliation.get("country", ""))
+    if country_data is None:
         return None
+    return cache.countries.get_or_create(**country_data)
 
 
 def _create_affiliation(data, authors):
@@ -262,7 +264,7 @@ def _create_affiliation(data, authors):
         for affiliation in author.get("affiliations", []):
             country = _create_country(affiliation)
             affiliation_data = {
-                "country": country,
+                "country_id": country,
                 "value": affiliation.get("value", ""),
                 "organization": affiliation.get("organization", ""),
             }
@@ -276,7 +278,56 @@ def _create_affiliation(data, authors):
     return affiliations
 
 
+def _source_hash(record, *options):
+    content = json.dumps(
+        [options, record],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(content.encode("UTF-8")).hexdigest()
+
+
+SOURCE_HASH_FIELDS = {
+    "import_to_scoap3": "_import_source_hash",
+    "update_affiliations": "_affiliations_source_hash",
+}
+
+
+def _changed_records(records, mode, *options):
+    """Drop the records imported before in ``mode`` with the same content."""
+    hashes = {
+        record["control_number"]: _source_hash(record, mode, *options)
+        for record in records
+    }
+    stored = dict(
+        Article.objects.filter(pk__in=hashes.keys()).values_list(
+            "pk", SOURCE_HASH_FIELDS[mode]
+        )
+    )
+    records = [
+        record
+        for record in records
+        if stored.get(record["control_number"]) != hashes[record["control_number"]]
+    ]
+    return records, {
+        record["control_number"]: hashes[record["control_number"]] for record in records
+    }
+
+
+def _save_source_hashes(mode, hashes):
+    field = SOURCE_HASH_FIELDS[mode]
+    Article.objects.bulk_update(
+        [Article(pk=pk, **{field: source_hash}) for pk, source_hash in hashes.items()],
+        [field],
+    )
+
+
 def import_to_scoap3(data, migrate_files):
+    records, hashes = _changed_records([data], "import_to_scoap3", migrate_files)
+    if not records:
+        return
     licenses = _create_licenses(data["license"])
     article = _create_article(data, licenses)
     if migrate_files:
@@ -290,49 +341,767 @@ def import_to_scoap3(data, migrate_files):
     authors = _create_author(data, article)
     _create_author_identifier(data, authors)
     _create_affiliation(data, authors)
+    _save_source_hashes("import_to_scoap3", hashes)
 
 
 def update_affiliations(data):
+    records, hashes = _changed_records([data], "update_affiliations")
+    if not records:
+        return
     licenses = _create_licenses(data["license"])
     article = _create_article(data, licenses)
     authors = _create_author(data, article)
     _create_affiliation(data, authors)
+    _save_source_hashes("update_affiliations", hashes)
+
+
+def _natural_key(model, fields, values):
+    return tuple(
+        model._meta.get_field(field).to_python(value)
+        for field, value in zip(fields, values)
+    )
+
+
+def _bulk_get_or_create(model, rows, **lookup):
+    """Bulk ``get_or_create`` of ``rows``, returning the pks by natural key."""
+    if not rows:
+        return {}
+    fields = list(rows[0].keys())
+    pks = {}
+    for pk, *values in model.objects.filter(**lookup).values_list("pk", *fields):
+        pks.setdefault(_natural_key(model, fields, values), pk)
+
+    missing = {}
+    for row in rows:
+        key = _natural_key(model, fields, row.values())
+        if key not in pks and key not in missing:
+            missing[key] = model(**row)
+    created = model.objects.bulk_create(missing.values())
+    for key, obj in zip(missing.keys(), created):
+        pks[key] = obj.pk
+    return pks
+
+
+def _get_pk(pks, model, row):
+    return pks[_natural_key(model, row.keys(), row.values())]
+
+
+def _bulk_link(through, rows):
+    through.objects.bulk_create([through(**row) for row in rows], ignore_conflicts=True)
+
+
+def _bulk_create_licenses(records):
+    licenses = {
+        record["control_number"]: _parse_licenses(record["license"])
+        for record in records
+    }
+    return {
+        article_id: [cache.licenses.get_or_create(**row) for row in article_licenses]
+        for article_id, article_licenses in licenses.items()
+    }
+
+
+def _bulk_create_articles(records, licenses):
+    articles = {record["control_number"]: record for record in records}
+    existing = Article.objects.in_bulk(articles.keys())
+
+    updated, created = [], []
+    for article_id, record in articles.items():
+        article_data = _parse_article(record)
+        if article_id in existing:
+            article = existing[article_id]
+            article.__dict__.update(**article_data)
+            article._updated_at = timezone.now()
+            updated.append(article)
+        else:
+            created.append(Article(**article_data))
+
+    Article.objects.bulk_update(
+        updated,
+        ["publication_date", "title", "subtitle", "abstract", "_updated_at"],
+    )
+    # ``_created_at`` is overwritten by ``auto_now_add`` on insert, so the
+    # legacy creation date has to be written in a second statement.
+    Article.objects.bulk_create(created)
+    for article in created:
+        article._created_at = articles[article.id].get("_created")
+    Article.objects.bulk_update(created, ["_created_at"])
+
+    through = Article.related_licenses.through
+    current = {
+        (article_id, license_id): pk
+        for pk, article_id, license_id in through.objects.filter(
+            article_id__in=articles.keys()
+        ).values_list("pk", "article_id", "license_id")
+    }
+    wanted = {
+        (article_id, license_id)
+        for article_id, license_ids in licenses.items()
+        for license_id in license_ids
+    }
+    through.objects.filter(
+        pk__in=[pk for link, pk in current.items() if link not in wanted]
+    ).delete()
+    _bulk_link(
+        through,
+        [
+            {"article_id": article_id, "license_id": license_id}
+            for article_id, license_id in wanted - current.keys()
+        ],
+    )
+    return list(articles.keys())
+
+
+def _bulk_create_article_files(records):
+    rows, metadata = [], []
+    for record in records:
+        for file in record.get("_files", []):
+            rows.append(
+                {
+                    "article_id_id": record["control_number"],
+                    "file": f"files/{record['control_number']}/{file.get('key')}",
+                }
+            )
+            metadata.append(_legacy_file_metadata(file))
+    pks = _bulk_get_or_create(
+        ArticleFile, rows, article_id__in={row["article_id_id"] for row in rows}
+    )
+    for field in ["size", "checksum", "content_type"]:
+        ArticleFile.objects.bulk_update(
+            [
+                ArticleFile(pk=_get_pk(pks, ArticleFile, row), **{field: values[field]})
+                for row, values in zip(rows, metadata)
+                if field in values
+            ],
+            [field],
+        )
+
+
+def _bulk_create_article_identifiers(records):
+    rows = []
+    for record in records:
+        for doi in record.get("dois"):
+            rows.append(
+                {
+                    "article_id_id": record["control_number"],
+                    "identifier_type": "DOI",
+                    "identifier_value": doi.get("value"),
+                }
+            )
+        for arxiv in record.get("arxiv_eprints", []):
+            rows.append(
+                {
+                    "article_id_id": record["control_number"],
+                    "identifier_type": "arXiv",
+                    "identifier_value": arxiv.get("value"),
+                }
+            )
+    _bulk_get_or_create(
+        ArticleIdentifier,
+        rows,
+        article_id__in={row["article_id_id"] for row in rows},
+    )
+
+
+def _bulk_create_copyrights(records):
+    rows = [
+        {
+            "article_id_id": record["control_number"],
+            "statement": copyright.get("statement", ""),
+            "holder": copyright.get("holder", ""),
+            "year": copyright.get("year"),
+        }
+        for record in records
+        for copyright in record.get("copyright", [])
+    ]
+    _bulk_get_or_create(
+        Copyright, rows, article_id__in={row["article_id_id"] for row in rows}
+    )
+
+
+def _bulk_create_article_arxiv_categories(records):
+    rows = [
+        {
+            "article_id_id": record["control_number"],
+            "category": arxiv_category,
+            "primary": True if idx == 0 else False,
+        }
+        for record in records
+        if "arxiv_eprints" in record.keys()
+        for idx, arxiv_category in enumerate(
+            record["arxiv_eprints"][0].get("categories", [])
+        )
+    ]
+    _bulk_get_or_create(
+        ArticleArxivCategory,
+        rows,
+        article_id__in={row["article_id_id"] for row in rows},
+    )
+
+
+def _bulk_create_publication_infos(records):
+    rows = []
+    for record in records:
+        publishers = [
+            cache.publishers.get_or_create(name=imprint.get("publisher"))
+            for imprint in record.get("imprints")
+        ]
+        for idx, publication_info in enumerate(record.get("publication_info", [])):
+            rows.append(
+                {
+                    "article_id_id": record["control_number"],
+                    "journal_volume": publication_info.get("journal_volume", ""),
+                    "journal_title": publication_info.get("journal_title", ""),
+                    "journal_issue": publication_info.get("journal_issue", ""),
+                    "page_start": publication_info.get("page_start", ""),
+                    "page_end": publication_info.get("page_end", ""),
+                    "artid": publication_info.get("artid", ""),
+                    "volume_year": publication_info.get("year"),
+                    "journal_issue_date": publication_info.get("journal_issue_date"),
+                    "publisher_id": publishers[idx],
+                }
+            )
+    _bulk_get_or_create(
+        PublicationInfo, rows, article_id__in={row["article_id_id"] for row in rows}
+    )
+
+
+def _bulk_create_experimental_collaborations(records):
+    for record in records:
+        for experimental_collaboration in record.get("collaborations", []):
+            cache.experimental_collaborations.get_or_create(
+                name=experimental_collaboration.get("value")
+            )
+
+
+def _bulk_create_authors(records):
+    rows = [
+        {"article_id_id": record["control_number"], **_parse_author(author, idx)}
+        for record in records
+        for idx, author in enumerate(record.get("authors", []))
+    ]
+    pks = _bulk_get_or_create(
+        Author, rows, article_id__in={row["article_id_id"] for row in rows}
+    )
+    return {
+        (row["article_id_id"], row["author_order"]): _get_pk(pks, Author, row)
+        for row in rows
+    }
+
+
+def _bulk_create_author_identifiers(records, authors):
+    rows = [
+        {
+            "author_id_id": authors[(record["control_number"], idx)],
+            "identifier_type": "ORCID",
+            "identifier_value": author.get("orcid"),
+        }
+        for record in records
+        for idx, author in enumerate(record.get("authors", []))
+        if "orcid" in author.keys()
+    ]
+    _bulk_get_or_create(
+        AuthorIdentifier, rows, author_id__in={row["author_id_id"] for row in rows}
+    )
+
+
+def _bulk_create_affiliations(records, authors):
+    links = []
+    for record in records:
+        for idx, author in enumerate(record.get("authors", [])):
+            for affiliation in author.get("affiliations", []):
+                affiliation_data = {
+                    "country_id": _create_country(affiliation),
+                    "value": affiliation.get("value", ""),
+                    "organization": affiliation.get("organization", ""),
+                }
+                links.append(
+                    (affiliation_data, authors[(record["control_number"], idx)])
+                )
+
+    rows = [affiliation_data for affiliation_data, _ in links]
+    pks = _bulk_get_or_create(
+        Affiliation, rows, value__in={row["value"] for row in rows}
+    )
+    _bulk_link(
+        Affiliation.author_id.through,
+        [
+            {"affiliation_id": _get_pk(pks, Affiliation, row), "author_id": author_id}
+            for row, author_id in links
+        ],
+    )
+
+
+def _update_search_index(article_ids):
+    if DODConfig.autosync_enabled():
+        transaction.on_commit(partial(index_articles.delay, article_ids))
+
+
+def import_to_scoap3_batch(records, migrate_files):
+    records, hashes = _changed_records(list(records), "import_to_scoap3", migrate_files)
+    if not records:
+        return
+    with transaction.atomic():
+        licenses = _bulk_create_licenses(records)
+        article_ids = _bulk_create_articles(records, licenses)
+        if migrate_files:
+            _bulk_create_article_files(records)
+        _bulk_create_article_identifiers(records)
+        _bulk_create_copyrights(records)
+        _bulk_create_article_arxiv_categories(records)
+        _bulk_create_publication_infos(records)
+        _bulk_create_experimental_collaborations(records)
+        authors = _bulk_create_authors(records)
+        _bulk_create_author_identifiers(records, authors)
+        _bulk_create_affiliations(records, authors)
+        _save_source_hashes("import_to_scoap3", hashes)
+    _update_search_index(article_ids)
+
+
+def update_affiliations_batch(records):
+    records, hashes = _changed_records(list(records), "update_affiliations")
+    if not records:
+        return
+    with transaction.atomic():
+        licenses = _bulk_create_licenses(records)
+        article_ids = _bulk_create_articles(records, licenses)
+        authors = _bulk_create_authors(records)
+        _bulk_create_affiliations(records, authors)
+        _save_source_hashes("update_affiliations", hashes)
+    _update_search_index(article_ids)
+
+
+def _build_archive(records):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as archive:
+        for record in records:
+            archive.write(json.dumps(record, ensure_ascii=False).encode("UTF-8"))
+            archive.write(b"\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _replace_file(storage, name, content):
+    # Storages pick another name when the file exists instead of overwriting.
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, content)
+
+
+def _save_legacy_documents(storage, folder_name, sources, archive):
+    if archive:
+        _replace_file(
+            storage,
+            f"{folder_name}/{sources[0]['control_number']}{ARCHIVE_SUFFIX}",
+            _build_archive(sources),
+        )
+        return
+
+    for data in sources:
+        file_name = data["control_number"]
+        json_data = io.BytesIO(json.dumps(data, ensure_ascii=False).encode("UTF-8"))
+        _replace_file(storage, f"{folder_name}/{file_name}.json", json_data)
 
 
 @celery_app.task()
 @backoff.on_exception(backoff.expo, (ConnectionError, ConnectionTimeout))
-def upload_index_range(es_settings, search_index, doc_ids, folder_name):
+def upload_index_range(es_settings, search_index, doc_ids, folder_name, archive=False):
     es = Elasticsearch(es_settings)
     response = es.mget(index=search_index, body={"ids": doc_ids})
-    documents = response["docs"]
-    storage = storages["legacy-records"]
+    sources = [document["_source"] for document in response["docs"]]
+    _save_legacy_documents(
+        storages["legacy-records"], folder_name, sources, archive=archive
+    )
 
-    for document in documents:
-        data = document["_source"]
-        file_name = data["control_number"]
-        json_data = io.BytesIO(json.dumps(data, ensure_ascii=False).encode("UTF-8"))
-        storage.save(f"{folder_name}/{file_name}.json", json_data)
+
+def _cursor_path(folder_name, lower, upper):
+    return f"cursors/{folder_name}/{lower}-{upper}.txt"
+
+
+def legacy_record_slices(es, search_index, slices):
+    response = es.search(
+        index=search_index,
+        body={
+            "size": 0,
+            "aggs": {
+                "min": {"min": {"field": "control_number"}},
+                "max": {"max": {"field": "control_number"}},
+            },
+        },
+    )
+    lowest = response["aggregations"]["min"]["value"]
+    highest = response["aggregations"]["max"]["value"]
+    if lowest is None:
+        return []
+    lowest, highest = int(lowest), int(highest) + 1
+    step = -(-(highest - lowest) // slices)
+    return [
+        (lower, min(lower + step, highest)) for lower in range(lowest, highest, step)
+    ]
 
 
 @celery_app.task()
-def migrate_legacy_records(folder_name, index_range, migrate_files):
+@backoff.on_exception(backoff.expo, (ConnectionError, ConnectionTimeout))
+def export_legacy_slice(
+    es_settings,
+    search_index,
+    folder_name,
+    lower,
+    upper,
+    batch_size,
+    archive=False,
+):
+    """Export a slice of records, resuming after the last exported one."""
+    es = Elasticsearch(es_settings)
     storage = storages["legacy-records"]
-    index_slice = slice(index_range[0], index_range[1])
-    for filename in storage.listdir(folder_name)[1][index_slice]:
-        if storage.exists(os.path.join(folder_name, filename)) and filename.endswith(
-            ".json"
-        ):
-            with storage.open(os.path.join(folder_name, filename)) as file:
-                json_data = json.load(file)
-                import_to_scoap3(json_data, migrate_files)
+    cursor_path = _cursor_path(folder_name, lower, upper)
 
+    search_after = None
+    if storage.exists(cursor_path):
+        with storage.open(cursor_path) as file:
+            search_after = int(file.read())
 
-@celery_app.task()
-def link_affiliations(folder_name, index_range):
+    exported = 0
+    while True:
+        body = {
+            "query": {"range": {"control_number": {"gte": lower, "lt": upper}}},
+            "sort": [{"control_number": "asc"}],
+            "size": batch_size,
+        }
+        if search_after is not None:
+            body["search_after"] = [search_after]
+        hits = es.search(index=search_index, body=body)["hits"]["hits"]
+        if not hits:
+            break
+
+        _save_legacy_documents(
+            storage, folder_name, [hit["_source"] for hit in hits], archive=archive
+        )
+        exported += len(hits)
+        search_after = hits[-1]["sort"][0]
+        _replace_file(
+            storage, cursor_path, io.BytesIO(str(search_after).encode("UTF-8"))
+        )
+
+    logger.info(
+        "Exported %s records with control numbers in [%s, %s)", exported, lower, upper
+    )
+    return exported
+
+
+def _manifest_path(folder_name):
+    return f"manifests/{folder_name}.txt"
+
+
+def list_legacy_records(folder_name, refresh=False):
+    """Return the filenames of a dump, from its manifest once listed."""
     storage = storages["legacy-records"]
-    index_slice = slice(index_range[0], index_range[1])
-    for filename in storage.listdir(folder_name)[1][index_slice]:
-        if storage.exists(os.path.join(folder_name, filename)):
-            with storage.open(os.path.join(folder_name, filename)) as file:
-                json_data = json.load(file)
-                update_affiliations(json_data)
+    manifest_path = _manifest_path(folder_name)
+    if not refresh and storage.exists(manifest_path):
+        with storage.open(manifest_path) as manifest:
+            return manifest.read().decode("UTF-8").split()
+
+    filenames = sorted(
+        filename
+        for filename in storage.listdir(folder_name)[1]
+        if filename.endswith((".json", ARCHIVE_SUFFIX))
+    )
+    _replace_file(
+        storage, manifest_path, io.BytesIO("\n".join(filenames).encode("UTF-8"))
+    )
+    return filenames
+
+
+def chunk_legacy_records(filenames, batch_size):
+    records = [filename for filename in filenames if filename.endswith(".json")]
+    for lower_index in range(0, len(records), batch_size):
+        upper_index = lower_index + batch_size
+        yield records[lower_index:upper_index]
+    for filename in filenames:
+        if filename.endswith(ARCHIVE_SUFFIX):
+            yield [filename]
+
+
+def _read_archive(file):
+    with gzip.open(file, mode="rt", encoding="UTF-8") as lines:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+class _HashingReader:
+    def __init__(self, file):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.sha256.update(data)
+        return data
+
+    def hexdigest(self):
+        while self.read(1024 * 1024):
+            pass
+        return self.sha256.hexdigest()
+
+
+def _legacy_file_hash(storage, path):
+    with storage.open(path) as file:
+        return _HashingReader(file).hexdigest()
+
+
+def _read_legacy_file(file, filename):
+    if filename.endswith(ARCHIVE_SUFFIX):
+        yield from _read_archive(file)
+    else:
+        yield json.load(file)
+
+
+def register_legacy_records(task_name, folder_name, filenames):
+    LegacyRecordFile.objects.bulk_create(
+        [
+            LegacyRecordFile(task=task_name, folder_name=folder_name, filename=name)
+            for name in filenames
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def pending_legacy_records(task_name, folder_name, filenames):
+    done = set(
+        LegacyRecordFile.objects.filter(
+            task=task_name,
+            folder_name=folder_name,
+            status=LegacyRecordFileStatus.DONE,
+        ).values_list("filename", flat=True)
+    )
+    return [filename for filename in filenames if filename not in done]
+
+
+def import_in_savepoints(records, import_function, report=True):
+    """Return the exceptions of the records that failed, by control number."""
+    failed = {}
+    with transaction.atomic():
+        for record in records:
+            try:
+                with transaction.atomic():
+                    import_function(record)
+            except Exception as e:
+                if report:
+                    logger.exception(
+                        "Failed to import record %s", record.get("control_number")
+                    )
+                    capture_exception(e)
+                else:
+                    logger.warning(
+                        "Failed to import record %s: %r",
+                        record.get("control_number"),
+                        e,
+                    )
+                failed[record.get("control_number")] = e
+    return failed
+
+
+def _import_records(
+    records, import_function, batch_function, bulk, atomic, report=True
+):
+    if bulk:
+        records = list(records)
+        try:
+            batch_function(records)
+            return {}
+        except Exception:
+            if not atomic:
+                raise
+            (logger.exception if report else logger.warning)(
+                "Bulk import failed, retrying record by record"
+            )
+    if atomic:
+        return import_in_savepoints(records, import_function, report)
+    for record in records:
+        with transaction.atomic():
+            import_function(record)
+    return {}
+
+
+def import_records(records, migrate_files=True):
+    """Import records sent to the API and return the outcome of each.
+
+    Failures are logged without reaching Sentry, they come from the client.
+    The reference caches are cleared first, web processes never warm them and
+    rows may have been deleted since the last request.
+    """
+    cache.clear()
+    control_numbers = [record["control_number"] for record in records]
+    existing = set(
+        Article.objects.filter(pk__in=control_numbers).values_list("pk", flat=True)
+    )
+    changed, _ = _changed_records(records, "import_to_scoap3", migrate_files)
+    changed = {record["control_number"] for record in changed}
+    failed = _import_records(
+        records,
+        partial(import_to_scoap3, migrate_files=migrate_files),
+        partial(import_to_scoap3_batch, migrate_files=migrate_files),
+        bulk=True,
+        atomic=True,
+        report=False,
+    )
+
+    results = []
+    for control_number in control_numbers:
+        result = {"control_number": control_number}
+        if control_number in failed:
+            result.update(status="failed", error="The record could not be imported.")
+        elif control_number not in changed:
+            result["status"] = "unchanged"
+        elif control_number in existing:
+            result["status"] = "updated"
+        else:
+            result["status"] = "created"
+        results.append(result)
+    return results
+
+
+def _import_legacy_records(
+    task_name, folder_name, filenames, import_function, batch_function, bulk, atomic
+):
+    started_at = timezone.now()
+    entries = {
+        entry.filename: entry
+        for entry in LegacyRecordFile.objects.filter(
+            task=task_name, folder_name=folder_name, filename__in=filenames
+        )
+    }
+    for filename in filenames:
+        entries.setdefault(
+            filename,
+            LegacyRecordFile(
+                task=task_name, folder_name=folder_name, filename=filename
+            ),
+        ).started_at = started_at
+
+    files = []
+    failed = {}
+    records = _read_legacy_files(folder_name, filenames, entries, files)
+    try:
+        while True:
+            batch = []
+            batch.extend(islice(records, LEGACY_RECORDS_BATCH_SIZE))
+            if not batch:
+                break
+            failed.update(
+                _import_records(batch, import_function, batch_function, bulk, atomic)
+            )
+    except Exception:
+        # Only the batch that raised is rolled back, the previous ones are done.
+        failed.update(dict.fromkeys(record.get("control_number") for record in batch))
+        _update_ledger(files, failed)
+        raise
+    _update_ledger(files, failed)
+    return list(failed)
+
+
+def _read_legacy_files(folder_name, filenames, entries, files):
+    storage = storages["legacy-records"]
+    for filename in filenames:
+        entry = entries[filename]
+        path = os.path.join(folder_name, filename)
+        control_numbers = []
+        try:
+            size, modified_at = storage.size(path), storage.get_modified_time(path)
+            if entry.status == LegacyRecordFileStatus.DONE and _legacy_file_unchanged(
+                storage, path, entry, size, modified_at
+            ):
+                logger.info("Skipping unchanged %s/%s", folder_name, filename)
+                continue
+            with storage.open(path) as file:
+                files.append((entry, control_numbers))
+                entry.status = LegacyRecordFileStatus.PENDING
+                entry.size, entry.modified_at = size, modified_at
+                reader = _HashingReader(file)
+                try:
+                    for record in _read_legacy_file(reader, filename):
+                        control_numbers.append(record.get("control_number"))
+                        yield record
+                except Exception:
+                    entry.status = LegacyRecordFileStatus.FAILED
+                    raise
+                entry.content_hash = reader.hexdigest()
+        except FileNotFoundError:
+            logger.warning("Legacy record %s/%s not found", folder_name, filename)
+            entry.content_hash = ""
+            entry.status = LegacyRecordFileStatus.FAILED
+            files.append((entry, control_numbers))
+
+
+def _legacy_file_unchanged(storage, path, entry, size, modified_at):
+    """Compare the storage metadata first, and the content only if it differs."""
+    if (entry.size, entry.modified_at) == (size, modified_at):
+        return True
+    if entry.content_hash != _legacy_file_hash(storage, path):
+        return False
+    entry.size, entry.modified_at = size, modified_at
+    entry.save(update_fields=["size", "modified_at"])
+    return True
+
+
+def _update_ledger(files, failed):
+    finished_at = timezone.now()
+    failed = set(failed)
+    for entry, control_numbers in files:
+        entry.records = len(control_numbers)
+        entry.failed_records = [
+            number for number in control_numbers if number in failed
+        ]
+        if entry.failed_records:
+            entry.status = LegacyRecordFileStatus.FAILED
+        elif entry.status == LegacyRecordFileStatus.PENDING:
+            entry.status = LegacyRecordFileStatus.DONE
+        entry.finished_at = finished_at
+
+    LegacyRecordFile.objects.bulk_create(
+        [entry for entry, _ in files],
+        update_conflicts=True,
+        unique_fields=["task", "folder_name", "filename"],
+        update_fields=[
+            "status",
+            "content_hash",
+            "size",
+            "modified_at",
+            "records",
+            "failed_records",
+            "started_at",
+            "finished_at",
+        ],
+    )
+
+
+@celery_app.task()
+def migrate_legacy_records(
+    folder_name, filenames, migrate_files, bulk=False, atomic=False
+):
+    cache.warm()
+    return _import_legacy_records(
+        "migrate_legacy_records",
+        folder_name,
+        filenames,
+        partial(import_to_scoap3, migrate_files=migrate_files),
+        partial(import_to_scoap3_batch, migrate_files=migrate_files),
+        bulk,
+        atomic,
+    )
+
+
+@celery_app.task()
+def link_affiliations(folder_name, filenames, bulk=False, atomic=False):
+    cache.warm()
+    return _import_legacy_records(
+        "link_affiliations",
+        folder_name,
+        filenames,
+        update_affiliations,
+        update_affiliations_batch,
+        bulk,
+        atomic,
+    )
@@ -0,0 +1,53 @@
+def legacy_record(control_number, **overrides):
+    record = {
+        "control_number": control_number,
+        "_created": "2018-06-12T08:31:42.123456+00:00",
+        "titles": [{"title": f"Title {control_number}", "subtitle": "Subtitle"}],
+        "abstracts": [{"value": "Abstract"}],
+        "imprints": [{"date": "2018-06-01", "publisher": "Springer"}],
+        "license": [
+            {"license": "CC-BY-4.0", "url": "http://creativecommons.org/licenses/"},
+            {"license": "Publisher license", "url": "Not an url"},
+        ],
+        "_files": [
+            {"key": f"{control_number}.pdf", "size": 1024, "checksum": "md5:abc"},
+            {"key": f"{control_number}.xml"},
+        ],
+        "dois": [{"value": f"10.1007/JHEP{control_number}"}],
+        "arxiv_eprints": [
+            {"value": f"1806.{control_number}", "categories": ["hep-th", "hep-ph"]}
+        ],
+        "copyright": [{"statement": "Authors", "holder": "Authors", "year": 2018}],
+        "publication_info": [
+            {
+                "journal_title": "JHEP",
+                "journal_volume": "2018",
+                "journal_issue": "6",
+                "artid": "42",
+                "year": 2018,
+            }
+        ],
+        "collaborations": [{"value": "ATLAS"}],
+        "authors": [
+            {
+                "full_name": "Doe, John",
+                "orcid": "0000-0002-1825-0097",
+                "affiliations": [
+                    {
+                        "value": "CERN, Geneva",
+                        "organization": "CERN",
+                        "country": "CERN",
+                    },
+                    {"value": "DESY, Hamburg", "country": "Germany"},
+                ],
+            },
+            {
+                "given_names": "Jane",
+                "surname": "Roe",
+                "email": "jane@example.org",
+                "affiliations": [{"value": "DESY, Hamburg", "country": "Germany"}],
+            },
+        ],
+    }
+    record.update(overrides)
+    return record
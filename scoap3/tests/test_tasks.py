@@ -0,0 +1,614 @@
+import copy
+import hashlib
+import io
+import json
+import mimetypes
+
+import pytest
+from django.core.management import call_command
+
+from scoap3 import tasks
+from scoap3.articles import signals
+from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.authors.models import Author, AuthorIdentifier
+from scoap3.misc.models import (
+    Affiliation,
+    ArticleArxivCategory,
+    Copyright,
+    Country,
+    ExperimentalCollaboration,
+    LegacyRecordFile,
+    LegacyRecordFileStatus,
+    License,
+    PublicationInfo,
+    Publisher,
+)
+from scoap3.tasks import (
+    _build_archive,
+    chunk_legacy_records,
+    export_legacy_slice,
+    import_to_scoap3,
+    import_to_scoap3_batch,
+    legacy_record_slices,
+    list_legacy_records,
+    migrate_legacy_records,
+    pending_legacy_records,
+    register_legacy_records,
+    update_affiliations,
+    update_affiliations_batch,
+)
+from scoap3.tests.factories import legacy_record
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def legacy_records():
+    return [
+        legacy_record(1),
+        legacy_record(2, collaborations=[{"value": "CMS"}]),
+        legacy_record(
+            3,
+            imprints=[{"date": "2019-01-01", "publisher": "Elsevier"}],
+            license=[{"license": "cc-by", "url": "Not an url"}],
+        ),
+    ]
+
+
+def _snapshot():
+    authors = {
+        author.id: (author.article_id_id, author.author_order)
+        for author in Author.objects.all()
+    }
+    return {
+        "articles": {
+            (
+                article.id,
+                article.title,
+                article.subtitle,
+                article.abstract,
+                article.publication_date,
+                article._created_at,
+                frozenset(
+                    (license.url, license.name)
+                    for license in article.related_licenses.all()
+                ),
+            )
+            for article in Article.objects.all()
+        },
+        "files": set(
+            ArticleFile.objects.values_list(
+                "article_id", "file", "size", "checksum", "content_type"
+            )
+        ),
+        "identifiers": set(
+            ArticleIdentifier.objects.values_list(
+                "article_id", "identifier_type", "identifier_value"
+            )
+        ),
+        "copyrights": set(
+            Copyright.objects.values_list("article_id", "statement", "holder", "year")
+        ),
+        "categories": set(
+            ArticleArxivCategory.objects.values_list(
+                "article_id", "category", "primary"
+            )
+        ),
+        "publication_infos": set(
+            PublicationInfo.objects.values_list(
+                "article_id",
+                "journal_title",
+                "journal_volume",
+                "journal_issue",
+                "artid",
+                "volume_year",
+                "publisher__name",
+            )
+        ),
+        "authors": set(
+            Author.objects.values_list(
+                "article_id", "first_name", "last_name", "email", "author_order"
+            )
+        ),
+        "author_identifiers": {
+            (authors[author_id], identifier_type, identifier_value)
+            for author_id, identifier_type, identifier_value in (
+                AuthorIdentifier.objects.values_list(
+                    "author_id", "identifier_type", "identifier_value"
+                )
+            )
+        },
+        "affiliations": {
+            (
+                affiliation.country_id,
+                affiliation.value,
+                affiliation.organization,
+                frozenset(authors[author.id] for author in affiliation.author_id.all()),
+            )
+            for affiliation in Affiliation.objects.all()
+        },
+        "counts": {
+            model.__name__: model.objects.count()
+            for model in [
+                Affiliation,
+                Country,
+                ExperimentalCollaboration,
+                License,
+                Publisher,
+            ]
+        },
+    }
+
+
+def _clear():
+    for model in [
+        Article,
+        Affiliation,
+        Country,
+        ExperimentalCollaboration,
+        License,
+        Publisher,
+    ]:
+        model.objects.all().delete()
+
+
+def test_import_batch_matches_per_record_import(legacy_records):
+    legacy_records.append(
+        legacy_record(
+            4,
+            imprints=[{"date": "2019-01-01", "publisher": "IOP"}],
+            publication_info=[],
+        )
+    )
+    for record in copy.deepcopy(legacy_records):
+        import_to_scoap3(record, True)
+    expected = _snapshot()
+
+    _clear()
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+
+    assert _snapshot() == expected
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_import_stores_legacy_file_metadata(legacy_records, batch):
+    ArticleFile.objects.create(
+        article_id=Article.objects.create(id=1, title="Title"), file="files/1/1.pdf"
+    )
+
+    if batch:
+        import_to_scoap3_batch(copy.deepcopy(legacy_records[:1]), True)
+    else:
+        import_to_scoap3(copy.deepcopy(legacy_records[0]), True)
+
+    assert set(
+        ArticleFile.objects.values_list("file", "size", "checksum", "content_type")
+    ) == {
+        ("files/1/1.pdf", 1024, "md5:abc", "application/pdf"),
+        ("files/1/1.xml", None, "", mimetypes.guess_type("1.xml")[0]),
+    }
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_import_keeps_stored_file_metadata(legacy_records, batch):
+    ArticleFile.objects.create(
+        article_id=Article.objects.create(id=1, title="Title"), file="files/1/1.pdf"
+    )
+    ArticleFile.objects.filter(file="files/1/1.pdf").update(
+        size=2048, checksum="md5:def", content_type="application/pdf"
+    )
+    legacy_records[0]["_files"] = [{"key": "1.pdf", "size": 4096}]
+
+    if batch:
+        import_to_scoap3_batch(copy.deepcopy(legacy_records[:1]), True)
+    else:
+        import_to_scoap3(copy.deepcopy(legacy_records[0]), True)
+
+    assert ArticleFile.objects.filter(file="files/1/1.pdf").values_list(
+        "size", "checksum", "content_type"
+    ).get() == (4096, "md5:def", "application/pdf")
+
+
+def test_import_batch_updates_existing_articles(legacy_records):
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+    for record in legacy_records:
+        record["titles"] = [{"title": "Updated"}]
+    legacy_records[0]["license"] = [{"license": "CC-BY-3.0", "url": ""}]
+    for record in copy.deepcopy(legacy_records):
+        import_to_scoap3(record, True)
+    expected = _snapshot()
+
+    _clear()
+    import_to_scoap3_batch(copy.deepcopy(legacy_records[:1]), True)
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+
+    assert _snapshot() == expected
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_import_skips_unchanged_records(
+    legacy_records, django_assert_num_queries, batch
+):
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+    Article.objects.update(title="Edited")
+
+    with django_assert_num_queries(1 if batch else 3):
+        if batch:
+            import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+        else:
+            for record in copy.deepcopy(legacy_records):
+                import_to_scoap3(record, True)
+
+    assert set(Article.objects.values_list("title", flat=True)) == {"Edited"}
+
+
+def test_import_reimports_changed_records(legacy_records):
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+    Article.objects.update(title="Edited")
+
+    legacy_records[0]["titles"] = [{"title": "Changed"}]
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+    assert dict(Article.objects.values_list("id", "title")) == {
+        1: "Changed",
+        2: "Edited",
+        3: "Edited",
+    }
+
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), False)
+    assert set(Article.objects.values_list("title", flat=True)) == {
+        "Changed",
+        "Title 2",
+        "Title 3",
+    }
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_import_modes_keep_their_own_source_hash(monkeypatch, legacy_records, batch):
+    written = []
+    create_article = tasks._create_article
+    bulk_create_articles = tasks._bulk_create_articles
+
+    def count_article(data, licenses):
+        written.append(data["control_number"])
+        return create_article(data, licenses)
+
+    def count_articles(records, licenses):
+        written.extend(record["control_number"] for record in records)
+        return bulk_create_articles(records, licenses)
+
+    monkeypatch.setattr(tasks, "_create_article", count_article)
+    monkeypatch.setattr(tasks, "_bulk_create_articles", count_articles)
+
+    for _ in range(2):
+        if batch:
+            import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+            update_affiliations_batch(copy.deepcopy(legacy_records))
+        else:
+            for record in copy.deepcopy(legacy_records):
+                import_to_scoap3(record, True)
+                update_affiliations(record)
+
+    assert len(written) == 2 * len(legacy_records)
+
+
+def test_import_restores_records_edited_outside_of_imports(legacy_records):
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+    article = Article.objects.get(pk=1)
+    article.title = "Edited"
+    article.save()
+
+    import_to_scoap3_batch(copy.deepcopy(legacy_records), True)
+
+    assert Article.objects.get(pk=1).title == "Title 1"
+
+
+def _save_legacy_records(storage, folder_name, records):
+    for record in records:
+        storage.save(
+            f"{folder_name}/{record['control_number']}.json",
+            io.BytesIO(json.dumps(record).encode("UTF-8")),
+        )
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_migrate_legacy_records_atomic_skips_bad_records(
+    legacy_storage, legacy_records, bulk
+):
+    legacy_records[1]["publication_info"] *= 2
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+
+    failed = migrate_legacy_records(
+        "dump", list_legacy_records("dump"), True, bulk=bulk, atomic=True
+    )
+
+    assert failed == [2]
+    assert set(Article.objects.values_list("id", flat=True)) == {1, 3}
+    assert not ArticleIdentifier.objects.filter(article_id=2).exists()
+
+
+def test_migrate_legacy_records_without_atomic_raises(legacy_storage, legacy_records):
+    legacy_records[1]["publication_info"] *= 2
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+
+    with pytest.raises(IndexError):
+        migrate_legacy_records("dump", list_legacy_records("dump"), True, bulk=True)
+    assert not Article.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migrate_legacy_records_indexes_each_record_once(
+    settings, monkeypatch, legacy_storage, legacy_records
+):
+    settings.OPENSEARCH_DSL_AUTOSYNC = True
+    indexed = []
+    monkeypatch.setattr(signals.index_articles, "delay", indexed.append)
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+
+    migrate_legacy_records("dump", list_legacy_records("dump"), True)
+
+    assert indexed == [[1], [2], [3]]
+
+
+def test_list_legacy_records_reuses_manifest(legacy_storage, legacy_records):
+    _save_legacy_records(legacy_storage, "dump", legacy_records[:2])
+    assert list_legacy_records("dump") == ["1.json", "2.json"]
+
+    _save_legacy_records(legacy_storage, "dump", legacy_records[2:])
+    assert list_legacy_records("dump") == ["1.json", "2.json"]
+    assert list_legacy_records("dump", refresh=True) == ["1.json", "2.json", "3.json"]
+
+
+def test_migrate_legacy_records_skips_missing_files(legacy_storage, legacy_records):
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+
+    migrate_legacy_records("dump", ["1.json", "4.json", "3.json"], True)
+
+    assert set(Article.objects.values_list("id", flat=True)) == {1, 3}
+
+
+def test_chunk_legacy_records_sends_archives_alone():
+    filenames = ["1.json", "1.ndjson.gz", "2.json", "3.json", "4.ndjson.gz"]
+
+    assert list(chunk_legacy_records(filenames, 2)) == [
+        ["1.json", "2.json"],
+        ["3.json"],
+        ["1.ndjson.gz"],
+        ["4.ndjson.gz"],
+    ]
+
+
+def test_migrate_legacy_records_from_archive(legacy_storage, legacy_records):
+    for record in copy.deepcopy(legacy_records):
+        import_to_scoap3(record, True)
+    expected = _snapshot()
+
+    _clear()
+    legacy_storage.save("dump/1.ndjson.gz", _build_archive(legacy_records[:2]))
+    _save_legacy_records(legacy_storage, "dump", legacy_records[2:])
+    filenames = list_legacy_records("dump")
+    assert filenames == ["1.ndjson.gz", "3.json"]
+
+    for chunk in chunk_legacy_records(filenames, 10):
+        migrate_legacy_records("dump", chunk, True, bulk=True)
+
+    assert _snapshot() == expected
+
+
+class FakeLegacyIndex:
+    def __init__(self, records):
+        self.records = sorted(records, key=lambda record: record["control_number"])
+        self.searches = 0
+
+    def search(self, index, body):
+        self.searches += 1
+        control_numbers = [record["control_number"] for record in self.records]
+        if "aggs" in body:
+            return {
+                "aggregations": {
+                    "min": {"value": min(control_numbers, default=None)},
+                    "max": {"value": max(control_numbers, default=None)},
+                }
+            }
+        bounds = body["query"]["range"]["control_number"]
+        after = body.get("search_after", [float("-inf")])[0]
+        hits = [
+            {"_source": record, "sort": [record["control_number"]]}
+            for record in self.records
+            if bounds["gte"] <= record["control_number"] < bounds["lt"]
+            and record["control_number"] > after
+        ]
+        return {"hits": {"hits": hits[: body["size"]]}}
+
+
+@pytest.fixture
+def legacy_index(monkeypatch):
+    index = FakeLegacyIndex([legacy_record(cn) for cn in range(1, 8)])
+    monkeypatch.setattr(tasks, "Elasticsearch", lambda settings: index)
+    return index
+
+
+def test_legacy_record_slices_cover_all_control_numbers(legacy_index):
+    assert legacy_record_slices(legacy_index, "records", 3) == [
+        (1, 4),
+        (4, 7),
+        (7, 8),
+    ]
+
+
+@pytest.mark.parametrize("archive", [False, True])
+def test_export_legacy_slice(legacy_storage, legacy_index, archive):
+    for lower, upper in legacy_record_slices(legacy_index, "records", 2):
+        export_legacy_slice([], "records", "dump", lower, upper, 2, archive=archive)
+
+    filenames = list_legacy_records("dump")
+    for chunk in chunk_legacy_records(filenames, 10):
+        migrate_legacy_records("dump", chunk, True)
+    assert set(Article.objects.values_list("id", flat=True)) == set(range(1, 8))
+
+
+@pytest.mark.parametrize("archive", [False, True])
+def test_export_legacy_slice_replaces_files_exported_before_a_crash(
+    legacy_storage, legacy_index, archive
+):
+    export_legacy_slice([], "records", "dump", 1, 8, 3, archive=archive)
+    exported = sorted(legacy_storage.listdir("dump")[1])
+    # Lost cursor, as when the worker dies between the files and the cursor.
+    legacy_storage.delete("cursors/dump/1-8.txt")
+
+    assert export_legacy_slice([], "records", "dump", 1, 8, 3, archive=archive) == 7
+    assert sorted(legacy_storage.listdir("dump")[1]) == exported
+
+
+def test_export_legacy_slice_resumes_from_cursor(legacy_storage, legacy_index):
+    assert export_legacy_slice([], "records", "dump", 1, 8, 3) == 7
+    assert export_legacy_slice([], "records", "dump", 1, 8, 3) == 0
+
+    legacy_storage.delete("cursors/dump/1-8.txt")
+    legacy_storage.save("cursors/dump/1-8.txt", io.BytesIO(b"5"))
+    legacy_index.searches = 0
+    assert export_legacy_slice([], "records", "dump", 1, 8, 3) == 2
+    assert legacy_index.searches == 2
+
+
+def test_migrate_legacy_records_imports_archives_in_batches(
+    monkeypatch, legacy_storage, legacy_records
+):
+    monkeypatch.setattr(tasks, "LEGACY_RECORDS_BATCH_SIZE", 2)
+    batches = []
+
+    def import_records(records, *args):
+        batches.append([record["control_number"] for record in records])
+        return []
+
+    monkeypatch.setattr(tasks, "_import_records", import_records)
+    archive = _build_archive(legacy_records)
+    legacy_storage.save("dump/1.ndjson.gz", archive)
+    _save_legacy_records(legacy_storage, "dump", legacy_records[:1])
+
+    migrate_legacy_records("dump", ["1.ndjson.gz", "1.json"], True, bulk=True)
+
+    assert batches == [[1, 2], [3, 1]]
+    entry = LegacyRecordFile.objects.get(filename="1.ndjson.gz")
+    assert entry.content_hash == hashlib.sha256(archive.getvalue()).hexdigest()
+    assert entry.records == 3
+
+
+def test_migrate_legacy_records_skips_unchanged_files(legacy_storage, legacy_records):
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+    migrate_legacy_records("dump", list_legacy_records("dump"), True, bulk=True)
+    Article.objects.update(title="Edited")
+
+    legacy_storage.delete("dump/2.json")
+    legacy_records[1]["titles"] = [{"title": "Changed"}]
+    _save_legacy_records(legacy_storage, "dump", legacy_records[1:2])
+    migrate_legacy_records("dump", list_legacy_records("dump"), True, bulk=True)
+
+    assert dict(Article.objects.values_list("id", "title")) == {
+        1: "Edited",
+        2: "Changed",
+        3: "Edited",
+    }
+
+
+def test_migrate_legacy_records_skips_done_files_without_reading_them(
+    monkeypatch, legacy_storage, legacy_records
+):
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+    filenames = list_legacy_records("dump")
+    migrate_legacy_records("dump", filenames, True, bulk=True)
+
+    def read(*args):
+        raise AssertionError("An unchanged file was read")
+
+    monkeypatch.setattr(tasks, "_legacy_file_hash", read)
+    monkeypatch.setattr(tasks, "_read_legacy_file", read)
+
+    assert migrate_legacy_records("dump", filenames, True, bulk=True) == []
+
+
+def test_migrate_legacy_records_hashes_files_with_new_metadata(
+    legacy_storage, legacy_records
+):
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+    filenames = list_legacy_records("dump")
+    migrate_legacy_records("dump", filenames, True, bulk=True)
+    LegacyRecordFile.objects.update(modified_at=None)
+    Article.objects.update(title="Edited")
+
+    migrate_legacy_records("dump", filenames, True, bulk=True)
+
+    assert set(Article.objects.values_list("title", flat=True)) == {"Edited"}
+    assert not LegacyRecordFile.objects.filter(modified_at=None).exists()
+
+
+def test_migrate_legacy_records_marks_only_the_failed_batch(
+    monkeypatch, legacy_storage, legacy_records
+):
+    monkeypatch.setattr(tasks, "LEGACY_RECORDS_BATCH_SIZE", 1)
+    legacy_records[1]["publication_info"] *= 2
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+
+    with pytest.raises(IndexError):
+        migrate_legacy_records("dump", list_legacy_records("dump"), True, bulk=True)
+
+    assert dict(LegacyRecordFile.objects.values_list("filename", "status")) == {
+        "1.json": LegacyRecordFileStatus.DONE,
+        "2.json": LegacyRecordFileStatus.FAILED,
+    }
+    assert list(Article.objects.values_list("id", flat=True)) == [1]
+
+
+def test_migrate_legacy_records_updates_ledger(legacy_storage, legacy_records):
+    legacy_records[1]["publication_info"] *= 2
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+    filenames = list_legacy_records("dump") + ["4.json"]
+    register_legacy_records("migrate_legacy_records", "dump", filenames)
+
+    migrate_legacy_records("dump", filenames, True, bulk=True, atomic=True)
+
+    entries = LegacyRecordFile.objects.filter(task="migrate_legacy_records")
+    assert {
+        entry.filename: (entry.status, entry.records, entry.failed_records)
+        for entry in entries
+    } == {
+        "1.json": (LegacyRecordFileStatus.DONE, 1, []),
+        "2.json": (LegacyRecordFileStatus.FAILED, 1, [2]),
+        "3.json": (LegacyRecordFileStatus.DONE, 1, []),
+        "4.json": (LegacyRecordFileStatus.FAILED, 0, []),
+    }
+    assert pending_legacy_records("migrate_legacy_records", "dump", filenames) == [
+        "2.json",
+        "4.json",
+    ]
+    assert pending_legacy_records("link_affiliations", "dump", filenames) == filenames
+
+
+def test_migrate_legacy_records_without_atomic_marks_batch_failed(
+    legacy_storage, legacy_records
+):
+    legacy_records[1]["publication_info"] *= 2
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+
+    with pytest.raises(IndexError):
+        migrate_legacy_records("dump", list_legacy_records("dump"), True, bulk=True)
+
+    assert set(LegacyRecordFile.objects.values_list("status", flat=True)) == {
+        LegacyRecordFileStatus.FAILED
+    }
+
+
+def test_legacy_migration_status(legacy_storage, legacy_records):
+    legacy_records[1]["publication_info"] *= 2
+    _save_legacy_records(legacy_storage, "dump", legacy_records)
+    filenames = list_legacy_records("dump")
+    register_legacy_records("migrate_legacy_records", "dump", filenames)
+    migrate_legacy_records("dump", filenames[:2], True, atomic=True)
+
+    out = io.StringIO()
+    call_command("legacy_migration_status", path="dump", stdout=out)
+
+    output = out.getvalue()
+    assert "Files: 1 done, 1 failed, 1 pending" in output
+    assert "Records: 2" in output
+    assert "Failed: 2.json 2" in output
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from scoap3.utils.throttling import forget_user_groups
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        forget_user_groups([instance.pk])
+    elif pk_set is not None:
+        forget_user_groups(pk_set)
+    else:
+        forget_user_groups(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    forget_user_groups(instance.user_set.values_list("pk", flat=True))
@@ -1,5 +1,12 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
 from django_elasticsearch_dsl_drf.pagination import QueryFriendlyPageNumberPagination
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -12,3 +19,92 @@ class OSStandardResultsSetPagination(QueryFriendlyPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class OSCursorPagination(BasePagination):
+    """Forward-only ``search_after`` pagination for document views.
+
+    Pages are sorted on ``ordering``, which must end with a unique field, and
+    linked by opaque cursors, so every page costs the same however deep it
+    is. Send an empty ``cursor`` to start, and ``count=true`` for the total.
+    Views should only compute facets for the first page.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ("-publication_date", "id.keyword")
+    # Types of the sort values of ``ordering``, dates sort as epoch millis.
+    cursor_types = ((int, str), str)
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        with_count = request.query_params.get(self.count_query_param) == "true"
+
+        search = queryset.sort(*self.ordering).extra(
+            size=page_size + 1, track_total_hits=with_count
+        )
+        if cursor is not None:
+            search = search.extra(search_after=cursor)
+
+        response = search.execute()
+        hits = list(response)
+        self.count = response.hits.total.value if with_count else None
+        self.facets = getattr(response, "aggregations", None)
+        self.next_cursor = None
+        if len(hits) > page_size:
+            hits = hits[:page_size]
+            self.next_cursor = list(hits[-1].meta.sort)
+        return hits
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        error = ValidationError(
+            {self.cursor_query_param: [self.invalid_cursor_message]}
+        )
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii"), altchars=b"-_"))
+        except (TypeError, ValueError):
+            raise error
+        if not isinstance(cursor, list) or len(cursor) != len(self.cursor_types):
+            raise error
+        for value, types in zip(cursor, self.cursor_types):
+            if isinstance(value, bool) or not isinstance(value, types):
+                raise error
+        return cursor
+
+    def encode_cursor(self, cursor):
+        encoded = b64encode(json.dumps(cursor).encode("UTF-8"), altchars=b"-_")
+        return encoded.decode("ascii")
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_cursor)
+        )
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["results"] = data
+        if self.facets is not None and hasattr(self.facets, "_d_"):
+            response["facets"] = self.facets._d_
+        return Response(response)
@@ -0,0 +1,28 @@
+def search_after_hits(client, index, body, tiebreaker, page_size=1000, keep_alive="1m"):
+    """Yield every hit of the search ``body`` in pages of ``page_size``.
+
+    Pages are read from a point in time with ``search_after``, so results are
+    consistent and memory stays constant however deep the result set is.
+    ``tiebreaker`` is a unique sortable field appended to the sort.
+    """
+    pit_id = client.create_point_in_time(
+        index=index, params={"keep_alive": keep_alive}
+    )["pit_id"]
+    body = {
+        **body,
+        "size": page_size,
+        "sort": [*body.get("sort", []), {tiebreaker: "asc"}],
+        "track_total_hits": False,
+    }
+    try:
+        while True:
+            body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+            response = client.search(body=body)
+            hits = response["hits"]["hits"]
+            if not hits:
+                return
+            yield from hits
+            pit_id = response.get("pit_id", pit_id)
+            body["search_after"] = hits[-1]["sort"]
+    finally:
+        client.delete_point_in_time(body={"pit_id": [pit_id]})
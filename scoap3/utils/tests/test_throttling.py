@@ -1,9 +1,23 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 
+import redis
+from django.contrib.auth.models import AnonymousUser, Group
 from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from scoap3.users.tests.factories import UserFactory
+from scoap3.utils.throttling import (
+    CacheHistoryLimiter,
+    RedisSlidingWindowLimiter,
+    UserGroupThrottle,
+)
 
 
 class TestsAPIThrottle(APITestCase):
@@ -17,3 +31,141 @@ class TestsAPIThrottle(APITestCase):
         self.client.get(_url)
         response = self.client.get(_url)
         self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class TestUserGroupThrottle(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.group = Group.objects.create(name="API_user")
+        self.user.groups.add(self.group)
+
+    def rate(self):
+        request = APIRequestFactory().get("/")
+        request.user = self.user
+        throttle = UserGroupThrottle()
+        throttle.allow_request(request, None)
+        return throttle.rate
+
+    def test_throttle_decision_without_queries(self):
+        with self.assertNumQueries(1):
+            self.rate()
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                self.assertEqual(
+                    self.rate(), api_settings.DEFAULT_THROTTLE_RATES["API_user"]
+                )
+
+    def test_anonymous_throttle_without_queries(self):
+        self.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.rate(), api_settings.DEFAULT_THROTTLE_RATES["DefaultUser"]
+            )
+
+    def test_group_changes_invalidate_cached_groups(self):
+        self.rate()
+        advanced = Group.objects.create(name="Advanced_user")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            advanced.user_set.add(self.user)
+        self.assertEqual(
+            self.rate(), api_settings.DEFAULT_THROTTLE_RATES["Advanced_user"]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.clear()
+        self.assertEqual(
+            self.rate(), api_settings.DEFAULT_THROTTLE_RATES["DefaultUser"]
+        )
+
+    def test_group_rename_invalidates_cached_groups(self):
+        self.rate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.name = "Admin"
+            self.group.save()
+
+        self.assertEqual(self.rate(), api_settings.DEFAULT_THROTTLE_RATES["Admin"])
+
+
+class TestCacheHistoryLimiter(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.limiter = CacheHistoryLimiter()
+        self.limiter.timer = lambda: self.now
+        self.now = 1000.0
+
+    def test_limits_requests_in_the_window(self):
+        self.assertEqual(self.limiter.hit("key", 2, 60), (True, None))
+        self.now += 30
+        self.assertEqual(self.limiter.hit("key", 2, 60), (True, None))
+        self.assertEqual(self.limiter.hit("key", 2, 60), (False, 30.0))
+        self.now += 31
+        self.assertEqual(self.limiter.hit("key", 2, 60), (True, None))
+
+    @override_settings(THROTTLE_LIMITER=f"{__name__}.RejectingLimiter")
+    def test_throttle_uses_the_configured_limiter(self):
+        request = APIRequestFactory().get("/")
+        request.user = AnonymousUser()
+        throttle = UserGroupThrottle()
+
+        self.assertFalse(throttle.allow_request(request, None))
+        self.assertEqual(throttle.wait(), 12.0)
+        self.assertEqual(RejectingLimiter.hits[-1][1:], (300, 86400))
+
+    @override_settings(THROTTLE_LIMITER=f"{__name__}.RejectingLimiter")
+    def test_throttle_reuses_the_limiter(self):
+        request = APIRequestFactory().get("/")
+        request.user = AnonymousUser()
+
+        UserGroupThrottle().allow_request(request, None)
+        UserGroupThrottle().allow_request(request, None)
+
+        self.assertEqual(RejectingLimiter.instances, 1)
+
+
+class RejectingLimiter:
+    hits = []
+    instances = 0
+
+    def __init__(self):
+        RejectingLimiter.instances += 1
+
+    def hit(self, key, num_requests, duration):
+        self.hits.append((key, num_requests, duration))
+        return False, 12.0
+
+
+class TestRedisSlidingWindowLimiter(TestCase):
+    def setUp(self):
+        self.client = redis.Redis.from_url(
+            os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+        )
+        self.client.ping()
+        self.key = f"throttle_test_{uuid.uuid4().hex}"
+        self.limiter = RedisSlidingWindowLimiter(self.client)
+        self.limiter.timer = lambda: self.now
+        self.now = 6000.0
+
+    def test_limits_requests_in_the_sliding_window(self):
+        for _ in range(4):
+            self.assertEqual(self.limiter.hit(self.key, 4, 60), (True, None))
+        self.assertEqual(self.limiter.hit(self.key, 4, 60), (False, 60.0))
+
+        # Two thirds of the previous window still count, 2.67 of its requests.
+        self.now += 80
+        self.assertEqual(self.limiter.hit(self.key, 4, 60), (True, None))
+        self.assertEqual(self.limiter.hit(self.key, 4, 60), (True, None))
+        self.assertEqual(self.limiter.hit(self.key, 4, 60), (False, 10.0))
+
+    def test_concurrent_requests_are_all_counted(self):
+        def hit():
+            limiter = RedisSlidingWindowLimiter(self.client)
+            limiter.timer = lambda: self.now
+            return limiter.hit(self.key, 50, 60)[0]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            allowed = list(executor.map(lambda _: hit(), range(100)))
+
+        self.assertEqual(allowed.count(True), 50)
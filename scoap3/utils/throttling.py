@@ -1,6 +1,121 @@
+import functools
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+from redis.exceptions import RedisError
 from rest_framework.settings import api_settings
 from rest_framework.throttling import SimpleRateThrottle
 
+logger = logging.getLogger(__name__)
+
+USER_GROUPS_CACHE_KEY = "throttle_user_groups_%s"
+USER_GROUPS_CACHE_TIMEOUT = 60 * 60
+
+
+def user_group_names(user) -> list[str]:
+    """Return the sorted group names of ``user``, cached until they change."""
+    if not user or not user.is_authenticated:
+        return []
+    key = USER_GROUPS_CACHE_KEY % user.pk
+    groups = cache.get(key)
+    if groups is None:
+        groups = sorted(user.groups.values_list("name", flat=True))
+        cache.set(key, groups, USER_GROUPS_CACHE_TIMEOUT)
+    return groups
+
+
+def forget_user_groups(user_ids) -> None:
+    """Drop the cached groups of ``user_ids`` once the transaction commits."""
+    keys = [USER_GROUPS_CACHE_KEY % pk for pk in user_ids]
+    if keys:
+        # Dropped after the commit, a concurrent request cannot cache the
+        # groups as they were before the change.
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class CacheHistoryLimiter:
+    """Keep the timestamps of the requests in a list in the Django cache.
+
+    Exact, like ``SimpleRateThrottle``, but the list is read and written back
+    on every request, grows with the rate and concurrent requests race.
+    """
+
+    timer = time.time
+
+    def hit(self, key, num_requests, duration) -> tuple[bool, float | None]:
+        """Count a request, returning whether it is allowed and else the wait."""
+        now = self.timer()
+        history = [at for at in cache.get(key, []) if at > now - duration]
+        if len(history) >= num_requests:
+            available = num_requests - len(history) + 1
+            remaining = duration - (now - history[-1])
+            return False, remaining / available if available > 0 else None
+        history.insert(0, now)
+        cache.set(key, history, duration)
+        return True, None
+
+
+# Sliding window counter: the requests of the current fixed window plus those
+# of the previous one, weighted by how much of it the sliding window covers.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+if previous * (window - elapsed) / window + current >= limit then
+    local wait = window - elapsed
+    if current < limit then
+        wait = wait - (limit - current) * window / previous
+    end
+    return {0, math.ceil(wait)}
+end
+redis.call("INCR", KEYS[1])
+redis.call("PEXPIRE", KEYS[1], 2 * window)
+return {1, 0}
+"""
+
+
+class RedisSlidingWindowLimiter:
+    """Count the requests atomically in Redis with a sliding window counter.
+
+    Two counters per key and a single round trip per request, whatever the
+    rate. Requests are allowed when Redis is unavailable.
+    """
+
+    timer = time.time
+
+    def __init__(self, client=None):
+        if client is None:
+            from django_redis import get_redis_connection
+
+            client = get_redis_connection("default")
+        self.script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def hit(self, key, num_requests, duration) -> tuple[bool, float | None]:
+        """Count a request, returning whether it is allowed and else the wait."""
+        now, window = int(self.timer() * 1000), int(duration * 1000)
+        index = now // window
+        try:
+            allowed, wait = self.script(
+                keys=[f"{key}:{index}", f"{key}:{index - 1}"],
+                args=[num_requests, window, now - index * window],
+            )
+        except RedisError:
+            logger.warning("Rate limiting %s failed", key, exc_info=True)
+            return True, None
+        return bool(allowed), wait / 1000 if not allowed else None
+
+
+@functools.cache
+def get_limiter(path):
+    """Return the shared instance of the limiter class at ``path``."""
+    return import_string(path)()
+
 
 class UserGroupThrottle(SimpleRateThrottle):
     def __init__(self):
@@ -17,10 +132,20 @@ class UserGroupThrottle(SimpleRateThrottle):
             return api_settings.DEFAULT_THROTTLE_RATES["API_user"]
 
     def allow_request(self, request, view) -> bool:
-        self.user_groups = request.user.groups.values_list("name", flat=True)
+        self.user_groups = user_group_names(request.user)
         self.rate = self.get_rate()
         self.num_requests, self.duration = self.parse_rate(self.rate)
-        return super().allow_request(request, view)
+        if self.rate is None:
+            return True
+
+        limiter = get_limiter(settings.THROTTLE_LIMITER)
+        allowed, self.wait_seconds = limiter.hit(
+            self.get_cache_key(request, view), self.num_requests, self.duration
+        )
+        return allowed
+
+    def wait(self) -> float | None:
+        return self.wait_seconds
 
     def get_cache_key(self, request, view) -> str | None:
         if request.user and request.user.is_authenticated: